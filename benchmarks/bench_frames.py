@@ -0,0 +1,79 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+# Compares building a DataFrame from iterated point dicts (with arrow parsing
+# timestamps) against query.to_dataframe(), using a local stub server.
+#
+#   python benchmarks/bench_frames.py --points 20000 --page-size 1000
+
+import argparse
+import json
+import time
+
+import arrow
+import pandas
+
+from context import pdk_client
+from stub_server import StubServer, STUB_TOKEN
+
+from pdk_client import PDKClient
+
+FIELDS = ['source', 'created', 'recorded', 'properties.level']
+
+
+def dict_path(query):
+    started = time.time()
+
+    rows = []
+
+    for point in query:
+        rows.append({
+            'source': point['source'],
+            'created': arrow.get(point['created']).datetime,
+            'recorded': arrow.get(point['recorded']).datetime,
+            'properties.level': point['properties']['level'],
+        })
+
+    frame = pandas.DataFrame(rows)
+
+    return frame, time.time() - started
+
+
+def column_path(query):
+    stats = {}
+
+    frame = query.to_dataframe(fields=FIELDS, stats=stats)
+
+    return frame, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=1000)
+
+    args = parser.parse_args()
+
+    with StubServer(size=args.points) as server:
+        client = PDKClient(site_url=server.url, token=STUB_TOKEN)
+
+        before, before_seconds = dict_path(client.query_data_points(page_size=args.page_size))
+        after, stats = column_path(client.query_data_points(page_size=args.page_size))
+
+        if len(before) != len(after):
+            raise RuntimeError('Row counts differ: %d (dicts) != %d (columns)' % (len(before), len(after)))
+
+        client.close()
+
+    print(json.dumps({
+        'points': args.points,
+        'dict_seconds': round(before_seconds, 3),
+        'column_seconds': round(stats['seconds'], 3),
+        'speedup': round(before_seconds / stats['seconds'], 2),
+        'peak_buffer_bytes': stats['peak_buffer_bytes'],
+        'process_peak_rss_bytes': stats['process_peak_rss_bytes'],
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+# Micro-benchmark of page decoding and filter serialization: each installed
+# JSON codec decoding a large page, and building page payloads with cached
+# filter strings versus re-serializing them with DatetimeEncoder every page.
+#
+#   python benchmarks/bench_json.py --points 5000 --repeat 20
+
+import argparse
+import datetime
+import json
+import time
+
+from context import pdk_client
+from stub_server import build_dataset, STUB_TOKEN
+
+from pdk_client.client import PDKDataPointQuery, PDKTransport
+from pdk_client.codec import DatetimeEncoder, JSON_CODECS, json_codec
+
+
+def timed(function, repeat):
+    started = time.time()
+
+    for _ in range(repeat):
+        function()
+
+    return (time.time() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=5000)
+    parser.add_argument('--property-bytes', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=10000)
+
+    args = parser.parse_args()
+
+    page = json.dumps({
+        'count': args.points,
+        'page_index': 0,
+        'page_size': args.points,
+        'matches': build_dataset(args.points, property_bytes=args.property_bytes),
+    }).encode('utf-8')
+
+    results = {
+        'page_bytes': len(page),
+        'decode_seconds': {},
+        'payload_seconds': {},
+    }
+
+    for name in JSON_CODECS:
+        try:
+            codec = json_codec(name)
+        except ImportError:
+            continue
+
+        results['decode_seconds'][name] = round(timed(lambda: codec.loads(page), args.repeat), 5)
+
+    transport = PDKTransport(codec='json')
+
+    query = PDKDataPointQuery(STUB_TOKEN, 'http://localhost', None, transport=transport)
+    query = query.filter(created__gte=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc), source__in=['source-%d' % index for index in range(50)]).exclude(generator_identifier='pdk-system-status').order_by('created', 'pk')
+
+    def uncached():
+        for page_index in range(args.pages):
+            {
+                'token': query.token,
+                'page_size': query.page_size,
+                'page_index': page_index,
+                'filters': json.dumps(query.filters, cls=DatetimeEncoder),
+                'excludes': json.dumps(query.excludes, cls=DatetimeEncoder),
+                'order_by': json.dumps(query.order_bys, cls=DatetimeEncoder),
+            }
+
+    def cached():
+        for page_index in range(args.pages):
+            query.page_payload(page_index)
+
+    results['payload_seconds']['per_page_dumps'] = round(timed(uncached, 1), 5)
+    results['payload_seconds']['cached'] = round(timed(cached, 1), 5)
+
+    transport.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+# Runs a fixed set of client workloads against a local stub server and saves
+# the results as JSON. Each workload runs in a fresh (spawned) process, so
+# peak RSS is measured per workload and excludes the stub server itself.
+#
+#   python benchmarks/bench_suite.py --points 20000 --latency 0.002 --output results.json
+#   python benchmarks/bench_suite.py --output after.json --compare before.json
+#
+# Request latency percentiles come from the client's own PDKStatsCollector.
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+
+from concurrent import futures
+
+from context import pdk_client
+from stub_server import StubServer
+
+from pdk_client import PDKClient, PDKInstrumentation, PDKRetryPolicy, PDKStatsCollector
+
+WORKLOADS = ('iterate', 'iterate_prefetch', 'count', 'first_last', 'getitem', 'update')
+
+
+def run_workload(name, url, options):
+    stats = PDKStatsCollector()
+
+    client = PDKClient(site_url=url, username='benchmark', password='benchmark', instrumentation=PDKInstrumentation(stats), retry_policy=PDKRetryPolicy(base_delay=options['retry_delay'], max_delay=options['retry_delay'] * 4)) # nosec
+
+    stats.reset() # Leave the token request out of the workload numbers.
+
+    rng = random.Random(options['seed']) # nosec
+
+    page_size = options['page_size']
+    operations = options['operations']
+
+    points = 0
+
+    started = time.time()
+
+    if name == 'iterate':
+        for point in client.query_data_points(page_size=page_size):
+            points += 1
+    elif name == 'iterate_prefetch':
+        for point in client.query_data_points(page_size=page_size).iterate(prefetch=4, workers=4):
+            points += 1
+    elif name == 'count':
+        for index in range(operations):
+            client.query_data_points(page_size=page_size).filter(source='source-%d' % (index % options['sources'])).count()
+    elif name == 'first_last':
+        for index in range(operations):
+            query = client.query_data_points(page_size=page_size).filter(source='source-%d' % (index % options['sources'])).order_by('created')
+
+            if query.first() is not None:
+                points += 1
+
+            if query.last() is not None:
+                points += 1
+    elif name == 'getitem':
+        query = client.query_data_points(page_size=page_size)
+
+        for index in range(operations):
+            if query[rng.randrange(options['points'])] is not None:
+                points += 1
+    elif name == 'update':
+        for index in range(operations):
+            client.update_data_sources().filter(identifier='source-%d' % rng.randrange(options['sources'])).update(name='Benchmark %d' % index)
+    else:
+        raise ValueError('Unknown workload: %s' % name)
+
+    elapsed = time.time() - started
+
+    client.close()
+
+    summary = stats.summary()
+
+    seconds = summary['request_seconds']
+
+    return {
+        'workload': name,
+        'seconds': round(elapsed, 4),
+        'operations': operations if name not in ('iterate', 'iterate_prefetch') else None,
+        'operations_per_sec': round(operations / elapsed, 2) if name not in ('iterate', 'iterate_prefetch') else None,
+        'requests': summary['requests'],
+        'retries': summary['retries'],
+        'pages': summary['pages'],
+        'pages_per_sec': round(summary['pages'] / elapsed, 2),
+        'points': points,
+        'points_per_sec': round(points / elapsed, 2),
+        'bytes': summary['bytes'],
+        'latency_p50': seconds['p50'],
+        'latency_p90': seconds['p90'],
+        'latency_p99': seconds['p99'],
+        'latency_max': seconds['max'],
+        'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def compare(results, baseline):
+    previous = dict((result['workload'], result) for result in baseline['results'])
+
+    for result in results:
+        before = previous.get(result['workload'], None)
+
+        if before is None:
+            continue
+
+        result['compare'] = {
+            'seconds_ratio': round(result['seconds'] / before['seconds'], 3) if before['seconds'] else None,
+            'latency_p50_ratio': round(result['latency_p50'] / before['latency_p50'], 3) if before['latency_p50'] and result['latency_p50'] else None,
+            'peak_rss_ratio': round(float(result['peak_rss_bytes']) / before['peak_rss_bytes'], 3) if before['peak_rss_bytes'] else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=10000, help='data points served by the stub')
+    parser.add_argument('--sources', type=int, default=10, help='data sources served by the stub')
+    parser.add_argument('--property-bytes', type=int, default=64, help='padding added to every point (page payload size)')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every stub response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub responses replaced by --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--retry-delay', type=float, default=0.05, help='client retry base delay, in seconds')
+    parser.add_argument('--operations', type=int, default=100, help='operations for count, first_last, getitem and update')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workloads', default=','.join(WORKLOADS))
+    parser.add_argument('--output', default=None, help='write results to this JSON file')
+    parser.add_argument('--compare', default=None, help='earlier results JSON to compare against')
+
+    args = parser.parse_args()
+
+    options = {
+        'points': args.points,
+        'sources': args.sources,
+        'page_size': args.page_size,
+        'operations': args.operations,
+        'seed': args.seed,
+        'retry_delay': args.retry_delay,
+    }
+
+    results = []
+
+    with StubServer(size=args.points, sources=args.sources, property_bytes=args.property_bytes, latency=args.latency, error_rate=args.error_rate, error_status=args.error_status) as server:
+        context = multiprocessing.get_context('spawn')
+
+        for name in args.workloads.split(','):
+            with futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_workload, name, server.url, options).result()
+
+            results.append(result)
+
+            print('%-18s %8.3fs %10.1f pages/s %12.1f points/s p50 %s' % (name, result['seconds'], result['pages_per_sec'], result['points_per_sec'], result['latency_p50']), file=sys.stderr)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': vars(args),
+        'results': results,
+    }
+
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            compare(results, json.load(baseline_file))
+
+    output = json.dumps(report, indent=2)
+
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+# Compares page throughput of one-connection-per-request posts (the previous
+# behavior) against the pooled PDKTransport, using a local stub server.
+#
+#   python benchmarks/bench_transport.py --pages 500 --latency 0.002
+
+import argparse
+import json
+import time
+
+from context import pdk_client
+from stub_server import StubServer, STUB_TOKEN
+
+from pdk_client.client import PDKTransport, post_request_with_retries
+
+
+def fetch_pages(url, pages, page_size, session=None):
+    started = time.time()
+
+    for page_index in range(pages):
+        payload = {
+            'token': STUB_TOKEN,
+            'page_size': page_size,
+            'page_index': page_index,
+            'filters': '[]',
+            'excludes': '[]',
+            'order_by': '[]',
+        }
+
+        post_request_with_retries(url, payload, session=session).json()
+
+    return pages / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0)
+
+    args = parser.parse_args()
+
+    with StubServer(size=args.page_size * args.pages, latency=args.latency) as server:
+        url = server.url + '/api/data-points.json'
+
+        before = fetch_pages(url, args.pages, args.page_size)
+
+        transport = PDKTransport()
+
+        after = fetch_pages(url, args.pages, args.page_size, session=transport.session)
+
+        transport.close()
+
+    print(json.dumps({
+        'pages': args.pages,
+        'unpooled_pages_per_sec': round(before, 1),
+        'pooled_pages_per_sec': round(after, 1),
+        'speedup': round(after / before, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+# Minimal in-process stand-in for the Passive Data Kit API endpoints used by
+# pdk_client. Not a faithful reimplementation of the server: filters support
+# plain equality plus the __gt/__gte/__lt/__lte/__in/__startswith lookups,
+# which is enough to drive the client through realistic paging workloads.
+
+import argparse
+import datetime
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+EPOCH = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Issued without a token_lifetime; not checked by the stub.
+STUB_TOKEN = 'stub-token' # nosec B105
+
+
+def build_dataset(size, sources=10, property_bytes=64):
+    points = []
+
+    padding = 'x' * property_bytes
+
+    for index in range(size):
+        created = EPOCH + datetime.timedelta(seconds=index)
+        source = 'source-%d' % (index % sources)
+
+        points.append({
+            'pk': index + 1,
+            'source': source,
+            'generator_identifier': 'pdk-device-battery',
+            'created': created.isoformat(),
+            'recorded': (created + datetime.timedelta(seconds=30)).isoformat(),
+            'properties': {
+                'level': index % 100,
+                'padding': padding,
+                'passive-data-metadata': {
+                    'source': source,
+                    'generator-id': 'pdk-device-battery',
+                    'timestamp': created.timestamp(),
+                },
+            },
+        })
+
+    return points
+
+
+def _field_value(item, field):
+    value = item
+
+    for part in field.split('__'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return None
+
+    return value
+
+
+def _matches(item, lookup, expected):
+    operator = 'exact'
+
+    for candidate in ('gte', 'gt', 'lte', 'lt', 'in', 'startswith'):
+        suffix = '__' + candidate
+
+        if lookup.endswith(suffix):
+            operator = candidate
+            lookup = lookup[:-len(suffix)]
+            break
+
+    value = _field_value(item, lookup)
+
+    if operator == 'exact':
+        return value == expected
+
+    if value is None:
+        return False
+
+    if operator == 'gt':
+        return value > expected
+
+    if operator == 'gte':
+        return value >= expected
+
+    if operator == 'lt':
+        return value < expected
+
+    if operator == 'lte':
+        return value <= expected
+
+    if operator == 'in':
+        return value in expected
+
+    return str(value).startswith(str(expected))
+
+
+def _normalize(value):
+    # Timestamps arrive as ISO strings; compare them on a common UTC footing.
+    if isinstance(value, str) and len(value) >= 19 and value[4:5] == '-' and value[10:11] == 'T':
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+
+            return parsed.astimezone(datetime.timezone.utc).isoformat()
+        except ValueError:
+            pass
+
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+
+    return value
+
+
+def apply_query(items, filters, excludes, order_bys):
+    def normalized(clause):
+        return dict((key, _normalize(value)) for key, value in clause.items())
+
+    filters = [normalized(clause) for clause in filters]
+    excludes = [normalized(clause) for clause in excludes]
+
+    results = []
+
+    for item in items:
+        keep = all(_matches(item, key, value) for clause in filters for key, value in clause.items())
+
+        if keep:
+            for clause in excludes:
+                if clause and all(_matches(item, key, value) for key, value in clause.items()):
+                    keep = False
+                    break
+
+        if keep:
+            results.append(item)
+
+    for fields in reversed(order_bys):
+        for field in reversed(fields):
+            reverse = field.startswith('-')
+            name = field.lstrip('-')
+
+            results.sort(key=lambda item, name=name: (_field_value(item, name) is None, _field_value(item, name)), reverse=reverse)
+
+    return results
+
+
+class StubState(object):
+    def __init__(self, size=10000, sources=10, property_bytes=64, latency=0.0, error_rate=0.0, error_status=503, token_lifetime=None, max_page_size=None):
+        self.points = build_dataset(size, sources=sources, property_bytes=property_bytes)
+        self.sources = [{'pk': index + 1, 'identifier': 'source-%d' % index, 'name': 'Source %d' % index} for index in range(sources)]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.faults = []
+        self.requests = []
+
+        # Larger page_size requests are answered with pages of max_page_size.
+        self.max_page_size = max_page_size
+
+        # With a token_lifetime (seconds), request-token issues distinct tokens
+        # and other endpoints answer 403 to unknown or expired tokens.
+        self.token_lifetime = token_lifetime
+        self.tokens = {}
+        self.tokens_issued = 0
+        self.lock = threading.Lock()
+
+        self._error_accumulator = 0.0
+
+    def next_fault(self):
+        with self.lock:
+            if self.faults:
+                return self.faults.pop(0)
+
+            if self.error_rate > 0:
+                self._error_accumulator += self.error_rate
+
+                if self._error_accumulator >= 1.0:
+                    self._error_accumulator -= 1.0
+
+                    return self.error_status
+
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state = self.server.state
+
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        params = dict((key, values[0]) for key, values in form.items())
+
+        with state.lock:
+            state.requests.append((self.path, params))
+
+        if state.latency:
+            time.sleep(state.latency)
+
+        fault = state.next_fault()
+
+        if fault is not None:
+            headers = {}
+
+            if isinstance(fault, tuple):
+                fault, headers = fault
+
+            if fault == 'drop':
+                self.close_connection = True
+                return
+
+            self._send(fault, {'error': 'injected'}, headers)
+            return
+
+        path = self.path.split('?')[0]
+
+        if path.endswith('/api/request-token.json'):
+            if state.token_lifetime is None:
+                expires = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+
+                self._send(200, {'token': STUB_TOKEN, 'expires': expires.isoformat()})
+                return
+
+            expires = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=state.token_lifetime)
+
+            with state.lock:
+                state.tokens_issued += 1
+
+                token = '%s-%d' % (STUB_TOKEN, state.tokens_issued)
+                state.tokens[token] = expires
+
+            self._send(200, {'token': token, 'expires': expires.isoformat()})
+        elif state.token_lifetime is not None and state.tokens.get(params.get('token', None), EPOCH) < datetime.datetime.now(datetime.timezone.utc):
+            self._send(403, {'error': 'invalid token'})
+        elif path.endswith('/api/data-points.json'):
+            self._send_page(state.points, params)
+        elif path.endswith('/api/data-sources.json'):
+            self._send_page(state.sources, params)
+        elif path.endswith('/api/data-sources/update.json'):
+            matches = apply_query(state.sources, json.loads(params.get('filters', '[]')), json.loads(params.get('excludes', '[]')), [])
+
+            for update in json.loads(params.get('updates', '[]')):
+                for match in matches:
+                    match.update(update)
+
+            self._send(200, {'updated': len(matches)})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def _send_page(self, items, params):
+        page_size = int(params.get('page_size', 100))
+
+        if self.server.state.max_page_size is not None:
+            page_size = min(page_size, self.server.state.max_page_size)
+
+        page_index = int(params.get('page_index', 0))
+
+        matches = apply_query(items, json.loads(params.get('filters', '[]')), json.loads(params.get('excludes', '[]')), json.loads(params.get('order_by', '[]')))
+
+        start = page_index * page_size
+
+        self._send(200, {
+            'count': len(matches),
+            'page_index': page_index,
+            'page_size': page_size,
+            'matches': matches[start:start + page_size],
+        })
+
+
+class StubServer(object):
+    def __init__(self, **kwargs):
+        self.state = StubState(**kwargs)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves a stub PDK API until interrupted.')
+    parser.add_argument('--points', type=int, default=10000)
+    parser.add_argument('--sources', type=int, default=10)
+    parser.add_argument('--property-bytes', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+
+    args = parser.parse_args()
+
+    server = StubServer(size=args.points, sources=args.sources, property_bytes=args.property_bytes, latency=args.latency, error_rate=args.error_rate, error_status=args.error_status)
+
+    print('Serving stub PDK API at %s' % server.url)
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,12 @@
 # pylint: skip-file
 
+import sys
+
+from .aggregates import Count, Min, Max, Sum, Avg
 from .client import PDKClient
+from .metrics import PDKInstrumentation, PDKStatsCollector
+from .rows import PDKDataPoint
+from .retry import PDKRetryPolicy, PDKClientCircuitOpen
+
+if sys.version_info >= (3, 6):
+    from .async_client import AsyncPDKClient
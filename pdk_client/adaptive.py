@@ -0,0 +1,82 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Iteration with a page size that follows observed response times and sizes.
+# Page sizes stay at min_page_size * 2^n, so halving always lands on a page
+# boundary; growing waits until the current offset is aligned to the larger size.
+
+import logging
+import time
+
+import requests
+
+from .projection import project_point
+
+def iterate_adaptive(query, min_page_size=25, max_page_size=6400, target_seconds=2.0, max_page_bytes=16 * 1024 * 1024): # pylint: disable=too-many-branches, too-many-locals
+    from .client import PDKClientTimeout # pylint: disable=import-outside-toplevel, cyclic-import
+
+    page_size = min_page_size
+
+    while page_size * 2 <= min(query.page_size, max_page_size):
+        page_size *= 2
+
+    url = query.site_url + '/api/data-points.json'
+
+    offset = 0
+
+    while True:
+        page_number = offset // page_size
+
+        started = time.time()
+
+        try:
+            response = query.transport.post(url, query.page_payload(page_number, page_size), server_timeout=query.timeout, retry_timeouts=page_size <= min_page_size)
+        except (PDKClientTimeout, requests.exceptions.Timeout) as error:
+            logging.warning('%s - halving page size from %d to %d', str(error), page_size, page_size // 2)
+
+            page_size = max(min_page_size, page_size // 2)
+
+            continue
+
+        elapsed = time.time() - started
+        page_bytes = len(response.content)
+
+        decode_started = time.time()
+
+        response_payload = query.transport.codec.loads(response.content)
+
+        if query.transport.instrumentation is not None:
+            query.transport.instrumentation.emit('page', url=url, page_index=response_payload['page_index'], page_size=response_payload['page_size'], cache=None, bytes=page_bytes, decode_seconds=time.time() - decode_started)
+
+        query.total_count = response_payload['count']
+
+        if response_payload['page_size'] != page_size:
+            # The server capped the page size: stay at (or below) its limit and
+            # request the current offset again in pages of that size.
+            page_size = response_payload['page_size']
+            max_page_size = min(max_page_size, page_size)
+            min_page_size = min(min_page_size, page_size)
+
+            continue
+
+        matches = response_payload['matches'][offset - (page_number * page_size):]
+
+        if query.fields:
+            # As in fetch_page(): servers without projection support return full points.
+            matches = [project_point(point, query.fields) for point in matches]
+
+        if query.row_type is not None:
+            matches = [query.row_type(point) for point in matches]
+
+        for item in matches: # pylint: disable=use-yield-from
+            yield item
+
+        offset += len(matches)
+
+        if not matches or offset >= query.total_count:
+            break
+
+        if (elapsed > target_seconds * 1.5 or page_bytes > max_page_bytes) and page_size > min_page_size:
+            page_size = max(min_page_size, page_size // 2)
+        elif elapsed < target_seconds / 2 and page_bytes * 2 <= max_page_bytes and page_size * 2 <= max_page_size and offset % (page_size * 2) == 0:
+            page_size *= 2
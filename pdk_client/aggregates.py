@@ -0,0 +1,299 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Django-style aggregation helpers for data point queries.
+#
+# Count(), Min() and Max() are answered by the server through count() and
+# single-item ordered requests. Other aggregates and grouped annotations fall
+# back to a client-side scan that fetches only the needed fields, several
+# pages at a time, and reduces each page to a small partial result.
+
+from builtins import object, range # pylint: disable=redefined-builtin
+
+import collections
+import json
+
+from concurrent import futures
+
+import arrow
+
+from .projection import field_value
+
+class Aggregate(object): # pylint: disable=useless-object-inheritance
+    # Counts points (or non-null values of `field`). Subclasses override
+    # reduce() (one page -> partial state), merge() (two partial states) and
+    # result() (final state -> value) to compute something else.
+
+    name = 'count'
+
+    def __init__(self, field=None):
+        self.field = field
+
+    @property
+    def default_alias(self):
+        if self.field is None:
+            return self.name
+
+        return self.field.replace('.', '__') + '__' + self.name
+
+    def values(self, points):
+        return [value for value in (field_value(point, self.field) for point in points) if value is not None]
+
+    def reduce(self, points):
+        if self.field is None:
+            return len(points)
+
+        return len(self.values(points))
+
+    def merge(self, state, other): # pylint: disable=no-self-use
+        return state + other
+
+    def result(self, state): # pylint: disable=no-self-use
+        return state
+
+class Count(Aggregate):
+    name = 'count'
+
+class Sum(Aggregate):
+    name = 'sum'
+
+    def reduce(self, points):
+        values = self.values(points)
+
+        if not values:
+            return None
+
+        return sum(values)
+
+    def merge(self, state, other):
+        if state is None:
+            return other
+
+        if other is None:
+            return state
+
+        return state + other
+
+class Avg(Aggregate):
+    name = 'avg'
+
+    def reduce(self, points):
+        values = self.values(points)
+
+        return (sum(values), len(values))
+
+    def merge(self, state, other):
+        return (state[0] + other[0], state[1] + other[1])
+
+    def result(self, state):
+        if state[1] == 0:
+            return None
+
+        return float(state[0]) / state[1]
+
+class Min(Aggregate):
+    name = 'min'
+    ordering = ''
+
+    def reduce(self, points):
+        values = self.values(points)
+
+        if not values:
+            return None
+
+        return min(values)
+
+    def merge(self, state, other):
+        if state is None:
+            return other
+
+        if other is None:
+            return state
+
+        return min(state, other)
+
+class Max(Min):
+    name = 'max'
+    ordering = '-'
+
+    def reduce(self, points):
+        values = self.values(points)
+
+        if not values:
+            return None
+
+        return max(values)
+
+    def merge(self, state, other):
+        if state is None:
+            return other
+
+        if other is None:
+            return state
+
+        return max(state, other)
+
+def named_aggregates(aggregates, named):
+    return [(aggregate.default_alias, aggregate) for aggregate in aggregates] + sorted(named.items(), key=lambda item: item[0])
+
+def server_extreme(query, aggregate):
+    # Min / Max as a single-item request ordered by the field, skipping nulls.
+
+    lookup = aggregate.field.replace('.', '__')
+
+    scoped = query.exclude(**{lookup: None}).only(aggregate.field)
+    scoped.order_bys = []
+
+    point = scoped.order_by(aggregate.ordering + lookup).first()
+
+    if point is None:
+        return None
+
+    return field_value(point, aggregate.field)
+
+def scan_pages(query, reduce_page, merge, workers=4):
+    # Fetches every page of `query` on a thread pool and folds the per-page
+    # partial results in page order. The first page also supplies the count.
+
+    first_page = query.fetch_page(0)
+
+    state = reduce_page(first_page['matches'])
+
+    page_size = first_page['page_size']
+    page_count = (first_page['count'] + page_size - 1) // page_size if page_size else 0
+
+    if page_count <= 1:
+        return state
+
+    executor = futures.ThreadPoolExecutor(max_workers=max(1, min(workers, page_count - 1)))
+
+    with executor:
+        for partial in executor.map(lambda page_number: reduce_page(query.fetch_page(page_number, page_size)['matches']), range(1, page_count)):
+            state = merge(state, partial)
+
+    return state
+
+def aggregate_query(query, aggregates, named, workers=4):
+    results = {}
+    scanned = []
+
+    for alias, aggregate in named_aggregates(aggregates, named):
+        if isinstance(aggregate, Count) and aggregate.field is None:
+            results[alias] = query.count()
+        elif isinstance(aggregate, Min):
+            results[alias] = server_extreme(query, aggregate)
+        else:
+            scanned.append((alias, aggregate))
+
+    if scanned:
+        fields = sorted(set(aggregate.field for alias, aggregate in scanned if aggregate.field is not None))
+
+        scan_query = query.only(*fields) if fields else query
+
+        def reduce_page(points):
+            return dict((alias, aggregate.reduce(points)) for alias, aggregate in scanned)
+
+        def merge(state, other):
+            return dict((alias, aggregate.merge(state[alias], other[alias])) for alias, aggregate in scanned)
+
+        state = scan_pages(scan_query, reduce_page, merge, workers=workers)
+
+        for alias, aggregate in scanned:
+            results[alias] = aggregate.result(state[alias])
+
+    return results
+
+def group_key(values):
+    # Hashable stand-in for a tuple of grouped values. Dicts and lists (such as
+    # properties.passive-data-metadata) are keyed by their sorted JSON form.
+
+    key = []
+
+    for value in values:
+        if isinstance(value, (dict, list)):
+            key.append(('json', json.dumps(value, sort_keys=True)))
+        else:
+            key.append(value)
+
+    return tuple(key)
+
+class PDKValuesQuery(object): # pylint: disable=useless-object-inheritance, too-few-public-methods
+    # query.values('source').annotate(Count()) -> [{'source': ..., 'count': ...}, ...]
+
+    def __init__(self, query, fields, workers=4):
+        self.query = query
+        self.fields = list(fields)
+        self.workers = workers
+
+    def annotate(self, *aggregates, **named):
+        annotations = named_aggregates(aggregates, named)
+
+        fields = set(self.fields)
+
+        for alias, aggregate in annotations:
+            if aggregate.field is not None:
+                fields.add(aggregate.field)
+
+        def reduce_page(points):
+            groups = collections.OrderedDict()
+
+            for point in points:
+                values = tuple(field_value(point, field) for field in self.fields)
+
+                groups.setdefault(group_key(values), (values, []))[1].append(point)
+
+            return collections.OrderedDict((key, (values, dict((alias, aggregate.reduce(group)) for alias, aggregate in annotations))) for key, (values, group) in groups.items())
+
+        def merge(state, other):
+            for key, (values, partial) in other.items():
+                if key in state:
+                    state[key] = (values, dict((alias, aggregate.merge(state[key][1][alias], partial[alias])) for alias, aggregate in annotations))
+                else:
+                    state[key] = (values, partial)
+
+            return state
+
+        state = scan_pages(self.query.only(*sorted(fields)), reduce_page, merge, workers=self.workers)
+
+        results = []
+
+        for values, partial in state.values():
+            row = dict(zip(self.fields, values))
+
+            for alias, aggregate in annotations:
+                row[alias] = aggregate.result(partial[alias])
+
+            results.append(row)
+
+        return results
+
+def histogram_query(query, field='created', interval=None, start=None, end=None, workers=8): # pylint: disable=too-many-arguments, too-many-positional-arguments
+    # Counts matches per time bucket with one count request per bucket.
+
+    from .extract import count_queries # pylint: disable=import-outside-toplevel
+
+    if start is None:
+        start = server_extreme(query, Min(field))
+
+    if end is None:
+        end = server_extreme(query, Max(field))
+
+    if start is None or end is None:
+        return []
+
+    start = arrow.get(start).datetime
+    end = arrow.get(end).datetime
+
+    lookup = field.replace('.', '__')
+
+    buckets = []
+    bucket_start = start
+
+    while bucket_start <= end:
+        buckets.append(bucket_start)
+
+        bucket_start = bucket_start + interval
+
+    queries = [query.filter(**{lookup + '__gte': bucket, lookup + '__lt': bucket + interval}) for bucket in buckets]
+
+    return list(zip(buckets, count_queries(queries, workers=workers)))
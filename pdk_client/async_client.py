@@ -0,0 +1,383 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# asyncio counterparts of PDKClient and its query objects. Requires Python 3
+# and the optional httpx package (pip install httpx).
+
+import asyncio
+import json
+import logging
+
+import arrow
+
+try:
+    import httpx
+except ImportError: # pragma: no cover
+    httpx = None
+
+from .client import PDK_API_DEFAULT_PAGE_SIZE, PDKClientTimeout, PDKClientServerError, DatetimeEncoder
+from .retry import PDKRetryPolicy
+
+async def async_post_request_with_retries(client, url, payload, max_retry_duration=480, initial_retry_duration=3.75, server_timeout=None, retry_policy=None): # pylint: disable=too-many-arguments, too-many-positional-arguments
+    last_error = None
+
+    if retry_policy is None:
+        retry_policy = PDKRetryPolicy(base_delay=initial_retry_duration, max_retry_duration=max_retry_duration)
+
+    timeout = 600
+
+    if server_timeout is not None:
+        timeout = server_timeout
+
+    delay = None
+    elapsed = 0
+
+    while True:
+        retry_policy.before_request()
+
+        response = None
+
+        try:
+            response = await client.post(url, data=payload, timeout=timeout)
+
+            if response.status_code == 200:
+                retry_policy.record_success()
+
+                return response
+
+            logging.warning('HTTP Code: %s', response.status_code)
+
+            if retry_policy.is_retryable_status(response.status_code) is False:
+                retry_policy.record_success()
+
+                response.raise_for_status()
+
+                raise PDKClientServerError('Unexpected HTTP status: %s' % response.status_code) # pylint: disable=consider-using-f-string
+
+            last_error = PDKClientTimeout('Server timeout error (504)') if response.status_code == 504 else PDKClientServerError('Server error (%s)' % response.status_code) # pylint: disable=consider-using-f-string
+
+            logging.warning('%s - %s', url, str(last_error))
+        except httpx.TransportError as error:
+            logging.warning(str(error))
+
+            last_error = error
+
+        retry_policy.record_failure()
+
+        delay = retry_policy.next_delay(delay, elapsed, retry_after=retry_policy.retry_after(response))
+
+        if delay is None:
+            raise last_error
+
+        logging.warning('Retrying in %.2f seconds...', delay)
+
+        await asyncio.sleep(delay)
+
+        elapsed += delay
+
+class AsyncPDKTransport: # pylint: disable=too-few-public-methods
+    def __init__(self, pool_size=10, concurrency=10, compression=True, retry_policy=None):
+        if httpx is None:
+            raise ImportError('AsyncPDKClient requires the httpx package (pip install httpx).')
+
+        self.pool_size = pool_size
+        self.concurrency = concurrency
+
+        self.retry_policy = retry_policy
+
+        if self.retry_policy is None:
+            self.retry_policy = PDKRetryPolicy()
+
+        headers = {}
+
+        if compression is False:
+            headers['Accept-Encoding'] = 'identity'
+
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+
+        self.client = httpx.AsyncClient(limits=limits, headers=headers)
+
+        # Created by limiter() inside the running loop: before Python 3.10,
+        # asyncio primitives bind to the loop that is current at construction.
+        self.semaphore = None
+        self.semaphore_loop = None
+
+    def limiter(self):
+        loop = asyncio.get_event_loop()
+
+        if self.semaphore is None or self.semaphore_loop is not loop:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.semaphore_loop = loop
+
+        return self.semaphore
+
+    async def post(self, url, payload, server_timeout=None):
+        async with self.limiter():
+            return await async_post_request_with_retries(self.client, url, payload, server_timeout=server_timeout, retry_policy=self.retry_policy)
+
+    async def close(self):
+        await self.client.aclose()
+
+class AsyncPDKClient:
+    def __init__(self, **kwargs):
+        self.site_url = kwargs['site_url']
+        self.expires = None
+        self.token = kwargs.get('token', None)
+        self.timeout = kwargs.get('timeout', None)
+
+        self.username = kwargs.get('username', None)
+        self.password = kwargs.get('password', None)
+
+        if 'transport' in kwargs:
+            self.transport = kwargs['transport']
+        else:
+            self.transport = AsyncPDKTransport(pool_size=kwargs.get('pool_size', 10), concurrency=kwargs.get('concurrency', 10), compression=kwargs.get('compression', True), retry_policy=kwargs.get('retry_policy', None))
+
+    async def __aenter__(self):
+        if self.token is None and self.username is not None and self.password is not None:
+            await self.generate_new_token(self.username, self.password)
+
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def generate_new_token(self, username, password):
+        payload = {
+            'username': username,
+            'password': password,
+        }
+
+        fetch_token = await self.transport.post(self.site_url + '/api/request-token.json', payload, server_timeout=self.timeout)
+
+        response_payload = fetch_token.json()
+
+        self.token = response_payload['token']
+        self.expires = arrow.get(response_payload['expires']).datetime
+
+    def expired(self):
+        if self.expires is None:
+            return False
+
+        return arrow.utcnow().datetime > self.expires
+
+    def connected(self):
+        if self.expired():
+            return False
+
+        return self.token is not None
+
+    def query_data_points(self, *args, **kwargs): # pylint: disable=unused-argument
+        now = arrow.utcnow().datetime
+
+        return AsyncPDKDataPointQuery(self.token, self.site_url, self.timeout, transport=self.transport, **kwargs).filter(recorded__lte=now)
+
+    def query_data_sources(self, *args, **kwargs): # pylint: disable=unused-argument
+        return AsyncPDKDataSourceQuery(self.token, self.site_url, self.timeout, transport=self.transport, **kwargs).exclude(pk=None)
+
+    def update_data_sources(self, *args, **kwargs): # pylint: disable=unused-argument
+        return AsyncPDKDataSourceUpdate(self.token, self.site_url, self.timeout, transport=self.transport, **kwargs).exclude(pk=None)
+
+    async def close(self):
+        await self.transport.close()
+
+class AsyncPDKQuery: # pylint: disable=too-many-instance-attributes
+    endpoint = None
+
+    def __init__(self, token, site_url, timeout, *args, **kwargs): # pylint: disable=unused-argument
+        self.token = token
+        self.site_url = site_url
+        self.timeout = timeout
+
+        self.transport = kwargs.pop('transport', None)
+
+        if self.transport is None:
+            self.transport = AsyncPDKTransport()
+
+        self.page_size = kwargs.pop('page_size', PDK_API_DEFAULT_PAGE_SIZE)
+
+        self.filters = []
+        self.excludes = []
+        self.order_bys = []
+
+        if kwargs:
+            self.filters.append(kwargs)
+
+        self.total_count = None
+        self.page_index = 0
+
+        self.current_page = None
+
+    def clone(self):
+        query = self.__class__(self.token, self.site_url, self.timeout, page_size=self.page_size, transport=self.transport)
+
+        query.filters = list(self.filters)
+        query.excludes = list(self.excludes)
+        query.order_bys = list(self.order_bys)
+
+        return query
+
+    def filter(self, **kwargs):
+        query = self.clone()
+
+        query.filters.append(kwargs)
+
+        return query
+
+    def exclude(self, **kwargs):
+        query = self.clone()
+
+        query.excludes.append(kwargs)
+
+        return query
+
+    def order_by(self, *args):
+        query = self.clone()
+
+        query.order_bys.append(args)
+
+        return query
+
+    async def count(self):
+        if self.total_count is not None:
+            return self.total_count
+
+        response_payload = await self.fetch_page(0, page_size=1)
+
+        self.total_count = response_payload['count']
+
+        return self.total_count
+
+    async def __aiter__(self):
+        await self.load_page(0)
+
+        while True:
+            for item in self.current_page:
+                yield item
+
+            if (self.page_index + 1) * self.page_size >= self.total_count:
+                break
+
+            await self.load_page(self.page_index + 1)
+
+    async def get(self, index):
+        if self.total_count is None:
+            await self.load_page(0)
+
+        if index < 0:
+            index = self.total_count + index
+
+        if index < 0 or index >= self.total_count:
+            return None
+
+        page_number = index // self.page_size
+
+        if page_number != self.page_index or self.current_page is None:
+            await self.load_page(page_number)
+
+        return self.current_page[index % self.page_size]
+
+    async def first(self):
+        return await self.get(0)
+
+    async def last(self):
+        return await self.get(-1)
+
+    async def fetch_page(self, page_number, page_size=None):
+        if page_size is None:
+            page_size = self.page_size
+
+        payload = {
+            'token': self.token,
+            'page_size': page_size,
+            'page_index': page_number,
+            'filters': json.dumps(self.filters, cls=DatetimeEncoder),
+            'excludes': json.dumps(self.excludes, cls=DatetimeEncoder),
+            'order_by': json.dumps(self.order_bys, cls=DatetimeEncoder),
+        }
+
+        fetch_page = await self.transport.post(self.site_url + self.endpoint, payload, server_timeout=self.timeout)
+
+        return fetch_page.json()
+
+    async def load_page(self, page_number):
+        response_payload = await self.fetch_page(page_number)
+
+        self.total_count = response_payload['count']
+        self.page_index = response_payload['page_index']
+        self.page_size = response_payload['page_size']
+
+        self.current_page = response_payload['matches']
+
+class AsyncPDKDataPointQuery(AsyncPDKQuery):
+    endpoint = '/api/data-points.json'
+
+class AsyncPDKDataSourceQuery(AsyncPDKQuery):
+    endpoint = '/api/data-sources.json'
+
+class AsyncPDKDataSourceUpdate: # pylint: disable=too-many-instance-attributes
+    def __init__(self, token, site_url, timeout, *args, **kwargs): # pylint: disable=unused-argument
+        self.token = token
+        self.site_url = site_url
+        self.timeout = timeout
+
+        self.transport = kwargs.pop('transport', None)
+
+        if self.transport is None:
+            self.transport = AsyncPDKTransport()
+
+        self.filters = []
+        self.excludes = []
+        self.updates = []
+
+        if kwargs:
+            self.filters.append(kwargs)
+
+        self.total_updated = 0
+
+    def clone(self):
+        query = AsyncPDKDataSourceUpdate(self.token, self.site_url, self.timeout, transport=self.transport)
+
+        query.filters = list(self.filters)
+        query.excludes = list(self.excludes)
+        query.updates = list(self.updates)
+
+        return query
+
+    def filter(self, **kwargs):
+        query = self.clone()
+
+        query.filters.append(kwargs)
+
+        return query
+
+    def exclude(self, **kwargs):
+        query = self.clone()
+
+        query.excludes.append(kwargs)
+
+        return query
+
+    async def update(self, **kwargs):
+        query = self.clone()
+
+        query.updates.append(kwargs)
+
+        return await query.execute()
+
+    def updated(self):
+        return self.total_updated
+
+    async def execute(self):
+        payload = {
+            'token': self.token,
+            'filters': json.dumps(self.filters, cls=DatetimeEncoder),
+            'excludes': json.dumps(self.excludes, cls=DatetimeEncoder),
+            'updates': json.dumps(self.updates, cls=DatetimeEncoder),
+        }
+
+        response = await self.transport.post(self.site_url + '/api/data-sources/update.json', payload, server_timeout=self.timeout)
+
+        self.total_updated = response.json()['updated']
+
+        return self.total_updated
@@ -0,0 +1,77 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Collects first(), last(), count() and page requests from many queries and
+# issues them together, concurrently over the client's pooled connections.
+# Each call returns a concurrent.futures.Future resolved when the batch runs.
+# Requests for the same query object run one after another, since first(),
+# last() and friends update that object's paging state.
+
+from builtins import object # pylint: disable=redefined-builtin
+
+import collections
+
+from concurrent import futures
+
+class PDKBatch(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, workers=8):
+        self.workers = workers
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+        else:
+            for pending_future, _, _ in self.pending:
+                pending_future.cancel()
+
+            self.pending = []
+
+    def add(self, query, function):
+        pending_future = futures.Future()
+
+        self.pending.append((pending_future, id(query), function))
+
+        return pending_future
+
+    def count(self, query):
+        return self.add(query, query.count)
+
+    def first(self, query):
+        return self.add(query, query.first)
+
+    def last(self, query):
+        return self.add(query, query.last)
+
+    def page(self, query, page_number):
+        return self.add(query, lambda: query.fetch_page(page_number)['matches'])
+
+    def execute(self):
+        pending = self.pending
+        self.pending = []
+
+        groups = collections.OrderedDict()
+
+        for pending_future, key, function in pending:
+            groups.setdefault(key, []).append((pending_future, function))
+
+        def run(entries):
+            for pending_future, function in entries:
+                if pending_future.set_running_or_notify_cancel() is False:
+                    continue
+
+                try:
+                    pending_future.set_result(function())
+                except Exception as error: # pylint: disable=broad-exception-caught
+                    pending_future.set_exception(error)
+
+        if groups:
+            executor = futures.ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(groups))))
+
+            with executor:
+                list(executor.map(run, list(groups.values())))
+
+        return [pending_future for pending_future, _, _ in pending]
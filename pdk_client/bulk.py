@@ -0,0 +1,81 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Bulk data source updates. Changes are given either as a mapping of source
+# identifier -> fields or as a list of (filters, fields) pairs. Identifiers
+# receiving the same fields are merged into identifier__in chunks, and every
+# chunk is sent as its own update request on a bounded thread pool. Updates
+# only assign fields, so the transport can safely send a failed chunk again.
+
+from builtins import range # pylint: disable=redefined-builtin
+
+import collections
+import json
+import logging
+
+from concurrent import futures
+
+import requests
+
+from .retry import PDKClientCircuitOpen
+
+def update_chunks(changes, chunk_size=100):
+    # Returns a list of (filters, fields) pairs, one per update request.
+
+    chunks = []
+
+    if isinstance(changes, dict):
+        grouped = collections.OrderedDict()
+
+        for identifier, fields in changes.items():
+            key = json.dumps(fields, sort_keys=True, default=str)
+
+            grouped.setdefault(key, (fields, []))[1].append(identifier)
+
+        for fields, identifiers in grouped.values():
+            for start in range(0, len(identifiers), chunk_size):
+                chunks.append(({'identifier__in': identifiers[start:start + chunk_size]}, fields))
+    else:
+        for filters, fields in changes:
+            chunks.append((filters, fields))
+
+    return chunks
+
+def execute_chunk(update, filters, fields):
+    # The transport already sends a failed request again under the client's
+    # retry policy, so each chunk is executed once and its final error reported.
+
+    from .client import PDKClientTimeout, PDKClientServerError # pylint: disable=import-outside-toplevel, cyclic-import
+
+    chunk = update.filter(**filters)
+    chunk.updates.append(fields)
+
+    try:
+        return chunk.execute(), None
+    except (PDKClientCircuitOpen, PDKClientTimeout, PDKClientServerError, requests.exceptions.RequestException) as error:
+        logging.warning('Update chunk failed: %s', str(error))
+
+        return 0, error
+
+def bulk_update(update, changes, chunk_size=100, workers=4):
+    chunks = update_chunks(changes, chunk_size=chunk_size)
+
+    results = []
+
+    if not chunks:
+        return results
+
+    executor = futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks))))
+
+    with executor:
+        outcomes = executor.map(lambda chunk: execute_chunk(update, chunk[0], chunk[1]), chunks)
+
+        for (filters, fields), (updated, error) in zip(chunks, outcomes):
+            results.append({
+                'filters': filters,
+                'updates': fields,
+                'updated': updated,
+                'error': error,
+            })
+
+    return results
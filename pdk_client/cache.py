@@ -0,0 +1,215 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# In-memory and on-disk page caches shared by PDKClient query objects.
+
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+class PDKPageCache(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, max_pages=64, max_bytes=None):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+
+        self.pages = collections.OrderedDict()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.pages:
+                payload, size = self.pages.pop(key)
+
+                self.pages[key] = (payload, size)
+
+                self.hits += 1
+
+                return payload
+
+            self.misses += 1
+
+        return None
+
+    def put(self, key, payload, size=0):
+        with self.lock:
+            if key in self.pages:
+                self.total_bytes -= self.pages.pop(key)[1]
+
+            self.pages[key] = (payload, size)
+            self.total_bytes += size
+
+            while self.pages and ((self.max_pages is not None and len(self.pages) > self.max_pages) or (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+                self.total_bytes -= self.pages.popitem(last=False)[1][1]
+
+    def clear(self, url=None):
+        # Drops every page, or only the pages fetched from `url`.
+
+        with self.lock:
+            if url is None:
+                self.pages.clear()
+                self.total_bytes = 0
+
+                return
+
+            for key in [key for key in self.pages if key[0] == url]:
+                self.total_bytes -= self.pages.pop(key)[1]
+
+class PDKDiskCache(object): # pylint: disable=useless-object-inheritance
+    # Persistent page store for immutable (snapshotted) data point queries,
+    # backed by a SQLite database under `directory`. Entries are evicted least
+    # recently used first once `max_bytes` is exceeded. `refresh` may be None
+    # (always reuse), True (always re-download) or a maximum age in seconds.
+
+    def __init__(self, directory, max_bytes=(1024 * 1024 * 1024), refresh=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.isdir(directory) is False:
+            os.makedirs(directory)
+
+        self.lock = threading.Lock()
+
+        self.database = sqlite3.connect(os.path.join(directory, 'pdk-pages.sqlite3'), check_same_thread=False)
+        self.database.execute('CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, content BLOB, size INTEGER, created REAL, accessed REAL)')
+        self.database.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)')
+        self.database.commit()
+
+    @staticmethod
+    def canonical_key(key):
+        url, filters, excludes, order_by, page_size, page_index = key[:6]
+
+        canonical = [url, json.loads(filters), json.loads(excludes), json.loads(order_by), int(page_size), int(page_index)]
+
+        if len(key) > 6:
+            canonical.append(json.loads(key[6]))
+
+        canonical = json.dumps(canonical, sort_keys=True)
+
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        if self.refresh is True:
+            with self.lock:
+                self.misses += 1
+
+            return None
+
+        digest = self.canonical_key(key)
+
+        now = time.time()
+
+        with self.lock:
+            row = self.database.execute('SELECT content, created FROM pages WHERE key = ?', (digest,)).fetchone()
+
+            if row is None or (self.refresh is not None and (now - row[1]) > self.refresh):
+                self.misses += 1
+
+                return None
+
+            self.database.execute('UPDATE pages SET accessed = ? WHERE key = ?', (now, digest))
+            self.database.commit()
+
+            self.hits += 1
+
+        # The raw response body; the caller decodes it and knows its size.
+        return bytes(row[0])
+
+    def put(self, key, content):
+        digest = self.canonical_key(key)
+
+        now = time.time()
+
+        with self.lock:
+            self.database.execute('INSERT OR REPLACE INTO pages (key, content, size, created, accessed) VALUES (?, ?, ?, ?, ?)', (digest, sqlite3.Binary(content), len(content), now, now))
+
+            if self.max_bytes is not None:
+                total_bytes = self.database.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+                while total_bytes > self.max_bytes:
+                    oldest = self.database.execute('SELECT key, size FROM pages ORDER BY accessed LIMIT 1').fetchone()
+
+                    if oldest is None:
+                        break
+
+                    self.database.execute('DELETE FROM pages WHERE key = ?', (oldest[0],))
+
+                    total_bytes -= oldest[1]
+
+            self.database.commit()
+
+    def clear(self):
+        with self.lock:
+            self.database.execute('DELETE FROM pages')
+            self.database.commit()
+
+    def close(self):
+        with self.lock:
+            self.database.close()
+
+def fetch_cached_page(transport, page_cache, url, payload, server_timeout=None, disk_cache=None): # pylint: disable=too-many-arguments, too-many-positional-arguments
+    key = (url, payload['filters'], payload['excludes'], payload['order_by'], payload['page_size'], payload['page_index'])
+
+    if 'fields' in payload:
+        key = key + (payload['fields'],)
+
+    instrumentation = transport.instrumentation
+
+    if page_cache is not None:
+        response_payload = page_cache.get(key)
+
+        if response_payload is not None:
+            if instrumentation is not None:
+                instrumentation.emit('page', url=url, page_index=payload['page_index'], page_size=payload['page_size'], cache='memory', bytes=None, decode_seconds=None)
+
+            return response_payload
+
+    if disk_cache is not None:
+        content = disk_cache.get(key)
+
+        if content is not None:
+            decode_started = time.time()
+
+            response_payload = transport.codec.loads(content)
+
+            if page_cache is not None:
+                page_cache.put(key, response_payload, len(content))
+
+            if instrumentation is not None:
+                instrumentation.emit('page', url=url, page_index=payload['page_index'], page_size=payload['page_size'], cache='disk', bytes=len(content), decode_seconds=time.time() - decode_started)
+
+            return response_payload
+
+    fetch_page = transport.post(url, payload, server_timeout=server_timeout)
+
+    if fetch_page.status_code != requests.codes.ok:
+        fetch_page.raise_for_status()
+
+    decode_started = time.time()
+
+    response_payload = transport.codec.loads(fetch_page.content)
+
+    if instrumentation is not None:
+        instrumentation.emit('page', url=url, page_index=payload['page_index'], page_size=payload['page_size'], cache=None, bytes=len(fetch_page.content), decode_seconds=time.time() - decode_started)
+
+    if page_cache is not None:
+        page_cache.put(key, response_payload, len(fetch_page.content))
+
+    if disk_cache is not None:
+        disk_cache.put(key, fetch_page.content)
+
+    return response_payload
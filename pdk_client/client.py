@@ -3,16 +3,38 @@
 
 from builtins import str, object # pylint: disable=redefined-builtin
 
+import collections
 import datetime
-import json
+import functools
 import logging
+import math
 import time
 
+from concurrent import futures
+
 import arrow
 import requests
 
 from past.utils import old_div
 
+from .adaptive import iterate_adaptive
+from .aggregates import aggregate_query, histogram_query, PDKValuesQuery
+from .batch import PDKBatch
+from .bulk import bulk_update
+from .cache import fetch_cached_page, PDKPageCache, PDKDiskCache
+from .codec import json_codec, serialized_query, DatetimeEncoder # pylint: disable=unused-import
+from .export import export_query
+from .extract import count_queries, extract_shards, partition_query, PDKExtraction
+from .frames import query_columns, query_dataframe, TIMESTAMP_FIELDS
+from .latest import fetch_latest
+from .projection import field_value, project_point
+from .retry import PDKRetryPolicy
+from .rows import PDKDataPoint
+from .slicing import PDKQuerySlice
+from .streaming import stream_matches
+from .sync import PDKSync
+from .tokens import PDKTokenManager
+
 PDK_API_DEFAULT_PAGE_SIZE = 100
 
 class PDKClientTimeout(Exception):
@@ -21,98 +43,245 @@ class PDKClientTimeout(Exception):
 class PDKClientServerError(Exception):
     pass
 
-def post_request_with_retries(url, payload, max_retry_duration=480, initial_retry_duration=3.75, server_timeout=None):
-    query = None
+def response_size(response, stream):
+    # Streamed bodies are not read yet; their size is known only from Content-Length.
+
+    if stream is False:
+        return len(response.content)
+
+    if 'Content-Length' in response.headers:
+        return int(response.headers['Content-Length'])
+
+    return None
+
+def post_request_with_retries(url, payload, max_retry_duration=480, initial_retry_duration=3.75, server_timeout=None, session=None, stream=False, retry_timeouts=True, retry_policy=None, instrumentation=None): # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-branches, too-many-locals, too-many-statements
     last_error = None
 
-    while initial_retry_duration <= max_retry_duration:
-        try:
-            query = None
+    poster = requests
+
+    if session is not None:
+        poster = session
+
+    if retry_policy is None:
+        retry_policy = PDKRetryPolicy(base_delay=initial_retry_duration, max_retry_duration=max_retry_duration)
+
+    timeout = 600
+
+    if server_timeout is not None:
+        timeout = server_timeout
+
+    delay = None
+    elapsed = 0
+    retries = 0
+
+    started = time.time()
+
+    # Every way out of the loop other than a response emits a failure event,
+    # including errors that are not retried (4xx, timeouts with retry_timeouts=False).
+
+    try:
+        while True:
+            retry_policy.before_request()
+
+            response = None
+
+            try:
+                response = poster.post(url, data=payload, timeout=timeout, stream=stream)
+
+                if response.status_code == requests.codes.ok:
+                    retry_policy.record_success()
+
+                    if instrumentation is not None:
+                        instrumentation.emit('request', url=url, status=response.status_code, seconds=time.time() - started, retries=retries, bytes=response_size(response, stream))
+
+                    return response
+
+                logging.warning('HTTP Code: %s', response.status_code)
+
+                if retry_policy.is_retryable_status(response.status_code) is False:
+                    # The server answered, so it is healthy; the request itself is at fault (400, 401, 404, ...).
+                    retry_policy.record_success()
+
+                    response.raise_for_status()
+
+                    raise PDKClientServerError('Unexpected HTTP status: %s' % response.status_code) # pylint: disable=consider-using-f-string
+
+                if response.status_code == 504:
+                    raise PDKClientTimeout('Server timeout error (504)')
+
+                raise PDKClientServerError('Server error (%s)' % response.status_code) # pylint: disable=consider-using-f-string
+            except requests.exceptions.Timeout as error:
+                if retry_timeouts is False:
+                    raise
+
+                logging.warning(str(error))
+
+                last_error = error
+            except requests.exceptions.ConnectionError as error:
+                logging.warning(str(error))
+
+                last_error = error
+            except PDKClientTimeout as error:
+                if retry_timeouts is False:
+                    raise
+
+                logging.warning('%s - %s', url, str(error))
+
+                last_error = error
+            except PDKClientServerError as error:
+                if response is None or retry_policy.is_retryable_status(response.status_code) is False:
+                    raise
 
-            if server_timeout is not None:
-                query = requests.post(url, data=payload, timeout=server_timeout)
-            else:
-                query = requests.post(url, data=payload, timeout=600)
+                logging.warning('%s - %s', url, str(error))
 
-            if query.status_code != 200:
-                logging.warning('HTTP Code: %s', query.status_code)
+                last_error = error
 
-            if query.status_code == 504:
-                raise PDKClientTimeout('Server timeout error (504)')
+            retry_policy.record_failure()
 
-            if query.status_code == requests.codes.ok:
-                return query
-        except requests.exceptions.HTTPError as error:
-            logging.warning(str(error))
-            logging.warning('Retrying in %.2f seconds...', initial_retry_duration)
+            delay = retry_policy.next_delay(delay, elapsed, retry_after=retry_policy.retry_after(response))
 
-            last_error = error
-        except requests.exceptions.Timeout as error:
-            logging.warning(str(error))
-            logging.warning('Retrying in %.2f seconds...', initial_retry_duration)
+            if delay is None:
+                raise last_error
 
-            last_error = error
-        except requests.exceptions.ConnectionError as error:
-            logging.warning(str(error))
-            logging.warning('Retrying in %.2f seconds...', initial_retry_duration)
+            if instrumentation is not None:
+                instrumentation.emit('retry', url=url, error=last_error, delay=delay)
 
-            last_error = error
+            retries += 1
 
-        except PDKClientTimeout as error:
-            logging.warning('%s - %s', url, str(error))
-            logging.warning('Retrying in %.2f seconds...', initial_retry_duration)
+            logging.warning('Retrying in %.2f seconds...', delay)
 
-            last_error = error
+            time.sleep(delay)
 
-        time.sleep(initial_retry_duration)
+            elapsed += delay
+    except Exception as error:
+        if instrumentation is not None:
+            instrumentation.emit('failure', url=url, error=error, retries=retries)
 
-        initial_retry_duration *= 2
+        raise
 
-    if last_error is not None:
-        raise last_error # pylint: disable=raising-bad-type
+# Shared by a PDKClient and every query derived from it, so that consecutive
+# page fetches reuse open connections instead of a new TCP + TLS handshake each.
 
-    raise Exception('Unknown error occurred.') # pylint: disable=broad-exception-raised
+class PDKTransport(object): # pylint: disable=useless-object-inheritance, too-many-instance-attributes
+    def __init__(self, pool_size=10, keep_alive=True, compression=True, retry_policy=None, instrumentation=None, codec=None): # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.compression = compression
+
+        self.retry_policy = retry_policy
+
+        if self.retry_policy is None:
+            self.retry_policy = PDKRetryPolicy()
+
+        self.instrumentation = instrumentation
+
+        self.codec = json_codec(codec)
+
+        # Set by PDKClient; supplies (and renews) the token of every request.
+        self.tokens = None
+
+        self.session = requests.Session()
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        if compression:
+            # Negotiates gzip and deflate, plus br when a Brotli decoder is installed.
+            self.session.headers['Accept-Encoding'] = requests.utils.default_headers()['Accept-Encoding']
+        else:
+            self.session.headers['Accept-Encoding'] = 'identity'
+
+        if keep_alive is False:
+            self.session.headers['Connection'] = 'close'
+
+    def post(self, url, payload, server_timeout=None, stream=False, retry_timeouts=True): # pylint: disable=too-many-arguments, too-many-positional-arguments
+        def send(payload):
+            return post_request_with_retries(url, payload, server_timeout=server_timeout, session=self.session, stream=stream, retry_timeouts=retry_timeouts, retry_policy=self.retry_policy, instrumentation=self.instrumentation)
+
+        if self.tokens is not None and 'token' in payload:
+            return self.tokens.send(send, payload)
+
+        return send(payload)
+
+    def close(self):
+        self.session.close()
 
 class PDKClient(object): # pylint: disable=useless-object-inheritance
     def __init__(self, **kwargs):
         self.site_url = kwargs['site_url']
-        self.expires = None
-        self.token = None
         self.timeout = None
 
+        if 'transport' in kwargs:
+            self.transport = kwargs['transport']
+        else:
+            self.transport = PDKTransport(pool_size=kwargs.get('pool_size', 10), keep_alive=kwargs.get('keep_alive', True), compression=kwargs.get('compression', True), retry_policy=kwargs.get('retry_policy', None), instrumentation=kwargs.get('instrumentation', None), codec=kwargs.get('json_codec', None))
+
+        if self.transport.tokens is None:
+            self.transport.tokens = PDKTokenManager(refresh_ahead=kwargs.get('token_refresh_ahead', 60))
+
+        if 'instrumentation' in kwargs:
+            self.transport.instrumentation = kwargs['instrumentation']
+
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+
+        self.page_cache = kwargs.get('page_cache', None)
+
+        if self.page_cache is None and ('page_cache_pages' in kwargs or 'page_cache_bytes' in kwargs):
+            self.page_cache = PDKPageCache(max_pages=kwargs.get('page_cache_pages', None), max_bytes=kwargs.get('page_cache_bytes', None))
+
+        self.disk_cache = kwargs.get('disk_cache', None)
+
+        if self.disk_cache is None and 'disk_cache_dir' in kwargs:
+            self.disk_cache = PDKDiskCache(kwargs['disk_cache_dir'], max_bytes=kwargs.get('disk_cache_bytes', 1024 * 1024 * 1024), refresh=kwargs.get('disk_cache_refresh', None))
+
         if 'token' in kwargs:
             self.token = kwargs['token']
         elif ('username' in kwargs) and ('password' in kwargs):
             self.generate_new_token(kwargs['username'], kwargs['password'])
 
-        if 'timeout' in kwargs:
-            self.timeout = kwargs['timeout']
 
+    @property
+    def token(self):
+        return self.transport.tokens.token
 
-    def generate_new_token(self, username, password):
+    @token.setter
+    def token(self, token):
+        self.transport.tokens.token = token
+
+    @property
+    def expires(self):
+        return self.transport.tokens.expires
+
+    @expires.setter
+    def expires(self, expires):
+        self.transport.tokens.expires = expires
+
+    def request_token(self, username, password):
         payload = {
             'username': username,
             'password': password,
         }
 
-        fetch_token = post_request_with_retries(self.site_url + '/api/request-token.json', payload, server_timeout=self.timeout)
+        fetch_token = self.transport.post(self.site_url + '/api/request-token.json', payload, server_timeout=self.timeout)
 
-        if fetch_token.status_code == requests.codes.ok:
-            response_payload = fetch_token.json()
-
-            self.token = response_payload['token']
-            self.expires = arrow.get(response_payload['expires']).datetime
-        else:
+        if fetch_token.status_code != requests.codes.ok:
             fetch_token.raise_for_status()
 
+        response_payload = fetch_token.json()
 
-    def expired(self):
-        if self.expires is None:
-            return False
+        return response_payload['token'], arrow.get(response_payload['expires']).datetime
+
+    def generate_new_token(self, username, password):
+        # Keeps the credentials so that the transport can renew the token before (or once it) expires.
 
-        now = arrow.utcnow().datetime
+        self.transport.tokens.renew = functools.partial(self.request_token, username, password)
+        self.transport.tokens.refresh()
 
-        return now > self.expires
+    def expired(self):
+        return self.transport.tokens.expired()
 
 
     def connected(self):
@@ -127,22 +296,73 @@ class PDKClient(object): # pylint: disable=useless-object-inheritance
     def query_data_points(self, *args, **kwargs): # pylint: disable=unused-argument
         # Add filter to recorded field so data set does not grow as data is added while querying...
 
-        now = arrow.utcnow().datetime
+        # Pass an earlier `snapshot` datetime to repeat a previous query exactly (and reuse its cached pages).
+
+        now = kwargs.pop('snapshot', None)
 
-        return PDKDataPointQuery(self.token, self.site_url, self.timeout, **kwargs).filter(recorded__lte=now)
+        if now is None:
+            now = arrow.utcnow().datetime
+
+        return PDKDataPointQuery(self.token, self.site_url, self.timeout, transport=self.transport, page_cache=self.page_cache, disk_cache=self.disk_cache, **kwargs).filter(recorded__lte=now)
 
     def query_data_sources(self, *args, **kwargs): # pylint: disable=unused-argument
-        return PDKDataSourceQuery(self.token, self.site_url, self.timeout, **kwargs).exclude(pk=None)
+        return PDKDataSourceQuery(self.token, self.site_url, self.timeout, transport=self.transport, page_cache=self.page_cache, **kwargs).exclude(pk=None)
 
     def update_data_sources(self, *args, **kwargs): # pylint: disable=unused-argument
-        return PDKDataSourceUpdate(self.token, self.site_url, self.timeout, **kwargs).exclude(pk=None)
+        return PDKDataSourceUpdate(self.token, self.site_url, self.timeout, transport=self.transport, page_cache=self.page_cache, **kwargs).exclude(pk=None)
+
+    def bulk_update_data_sources(self, changes, chunk_size=100, workers=4):
+        return self.update_data_sources().bulk(changes, chunk_size=chunk_size, workers=workers)
+
+    def sync(self, query, state_path): # pylint: disable=no-self-use
+        # Yields the points of `query` recorded since the previous sync using the same state file.
+
+        return iter(PDKSync(query, state_path))
+
+    def batch(self, workers=None):
+        # Collects requests from many queries and runs them concurrently when the `with` block exits.
+
+        if workers is None:
+            workers = self.transport.pool_size
 
-class PDKDataPointQuery(object): # pylint: disable=too-many-instance-attributes, useless-object-inheritance
+        return PDKBatch(workers=workers)
+
+    def count_many(self, queries, workers=8): # pylint: disable=no-self-use
+        # Counts several queries concurrently; each query keeps its own count afterwards.
+
+        return count_queries(queries, workers=workers)
+
+    def extract(self, query, partitions=4, by='created', workers=None, ordered=False, sources=None): # pylint: disable=no-self-use, too-many-arguments, too-many-positional-arguments, invalid-name
+        # Splits `query` into disjoint partitions and iterates them concurrently as one stream.
+
+        return PDKExtraction(query.partition(partitions, by=by, sources=sources), workers=workers, ordered=ordered)
+
+    def extract_shards(self, query, directory, partitions=4, by='created', format='jsonl', columns=None, workers=None, processes=True): # pylint: disable=no-self-use, too-many-arguments, too-many-positional-arguments, invalid-name, redefined-builtin
+        # Exports each partition of `query` to its own file in `directory`, one worker process per partition.
+
+        return extract_shards(query.partition(partitions, by=by), directory, export_format=format, columns=columns, workers=workers, processes=processes)
+
+    def close(self):
+        self.transport.close()
+
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+class PDKDataPointQuery(object): # pylint: disable=too-many-instance-attributes, useless-object-inheritance, too-many-public-methods
     def __init__(self, token, site_url, timeout, *args, **kwargs): # pylint: disable=unused-argument
         self.token = token
         self.site_url = site_url
         self.timeout = timeout
 
+        self.transport = kwargs.pop('transport', None)
+
+        if self.transport is None:
+            self.transport = PDKTransport()
+
+        self.page_cache = kwargs.pop('page_cache', None)
+        self.disk_cache = kwargs.pop('disk_cache', None)
+        self.row_type = kwargs.pop('row_type', None)
+
         page_size = PDK_API_DEFAULT_PAGE_SIZE
 
         if 'page_size' in kwargs:
@@ -154,6 +374,7 @@ class PDKDataPointQuery(object): # pylint: disable=too-many-instance-attributes,
         self.filters = []
         self.excludes = []
         self.order_bys = []
+        self.fields = []
 
         if kwargs:
             self.filters.append(kwargs)
@@ -164,34 +385,65 @@ class PDKDataPointQuery(object): # pylint: disable=too-many-instance-attributes,
 
         self.current_page = None
 
-    def filter(self, **kwargs):
-        query = PDKDataPointQuery(self.token, self.site_url, self.timeout, page_size=self.page_size)
+        self.serialized = None
+
+    def clone(self):
+        query = PDKDataPointQuery(self.token, self.site_url, self.timeout, page_size=self.page_size, transport=self.transport, page_cache=self.page_cache, disk_cache=self.disk_cache, row_type=self.row_type)
 
         query.filters = list(self.filters)
         query.excludes = list(self.excludes)
         query.order_bys = list(self.order_bys)
+        query.fields = list(self.fields)
+
+        return query
+
+    def only(self, *fields):
+        # Restricts matches to the given (dotted) fields, e.g. only('created', 'source', 'properties.level').
+
+        query = self.clone()
+
+        query.fields = list(fields)
+
+        return query
+
+    def as_rows(self, row_type=PDKDataPoint):
+        # Yields compact PDKDataPoint rows (or `row_type(point)`) instead of dicts; as_rows(None) restores dicts.
+
+        query = self.clone()
+
+        query.row_type = row_type
+
+        return query
+
+    def values_list(self, *fields, **kwargs):
+        # Arguments are checked here, when called, rather than on first iteration.
+
+        flat = kwargs.get('flat', False)
+
+        if flat and len(fields) != 1:
+            raise TypeError('"flat" is only valid when values_list is called with a single field.')
+
+        if flat:
+            return (field_value(point, fields[0]) for point in self.only(*fields))
+
+        return (tuple(field_value(point, field) for field in fields) for point in self.only(*fields))
+
+    def filter(self, **kwargs):
+        query = self.clone()
 
         query.filters.append(kwargs)
 
         return query
 
     def exclude(self, **kwargs):
-        query = PDKDataPointQuery(self.token, self.site_url, self.timeout, page_size=self.page_size)
-
-        query.filters = list(self.filters)
-        query.excludes = list(self.excludes)
-        query.order_bys = list(self.order_bys)
+        query = self.clone()
 
         query.excludes.append(kwargs)
 
         return query
 
     def order_by(self, *args):
-        query = PDKDataPointQuery(self.token, self.site_url, self.timeout, page_size=self.page_size)
-
-        query.filters = list(self.filters)
-        query.excludes = list(self.excludes)
-        query.order_bys = list(self.order_bys)
+        query = self.clone()
 
         query.order_bys.append(args)
 
@@ -201,7 +453,10 @@ class PDKDataPointQuery(object): # pylint: disable=too-many-instance-attributes,
         if self.total_count is not None:
             return self.total_count
 
-        self.load_page(0)
+        # A single-item page is enough to learn the total without transferring a full page of matches.
+        response_payload = self.fetch_page(0, page_size=1)
+
+        self.total_count = response_payload['count']
 
         return self.total_count
 
@@ -246,62 +501,234 @@ class PDKDataPointQuery(object): # pylint: disable=too-many-instance-attributes,
 
             return self.current_page[index % self.page_size]
         elif isinstance(slice_item, slice):
-            logging.error('SLICE NOT YET SUPPORTED: %s', str(slice_item))
+            return PDKQuerySlice(self, slice_item)
 
         return []
 
     def first(self):
-        self.load_page(0)
+        response_payload = self.fetch_page(0, page_size=1)
+
+        self.total_count = response_payload['count']
 
-        if self.total_count is not None and self.total_count > 0:
-            return self[0]
+        if response_payload['matches']:
+            return response_payload['matches'][0]
 
         return None
 
     def last(self):
-        self.load_page(0)
+        matches = self.latest(1)
 
-        if self.total_count is not None and self.total_count > 0:
-            return self[-1]
+        if matches:
+            return matches[0]
 
         return None
 
-    def load_page(self, page_number):
-        self.page_index = page_number
+    def latest(self, count=1):
+        return fetch_latest(self, count)
+
+    def iterate(self, prefetch=4, workers=4):
+        # Yields matches in order while up to `prefetch` upcoming pages are
+        # fetched in the background, so network latency overlaps consumption.
+
+        for page in self.iterate_pages(prefetch=prefetch, workers=workers):
+            for item in page['matches']: # pylint: disable=use-yield-from
+                yield item
+
+    def iterate_pages(self, prefetch=4, workers=4):
+        # Yields page payloads in order, fetching up to `prefetch` pages ahead
+        # on a thread pool. With prefetch=0, each page is fetched on demand.
+
+        if prefetch < 0:
+            raise ValueError('prefetch must be zero or greater.')
+
+        page = self.fetch_page(0)
+
+        self.total_count = page['count']
+        self.page_size = page['page_size']
+
+        page_count = int(math.ceil(float(self.total_count) / self.page_size)) if self.page_size else 0
+
+        executor = None
+
+        if prefetch > 0 and page_count > 1:
+            executor = futures.ThreadPoolExecutor(max_workers=max(1, workers))
+
+        pending = collections.deque()
+        next_page = 1
+
+        try:
+            while True:
+                while executor is not None and next_page < page_count and len(pending) < prefetch:
+                    pending.append(executor.submit(self.fetch_page, next_page))
+
+                    next_page += 1
+
+                yield page
+
+                if pending:
+                    page = pending.popleft().result()
+                elif next_page < page_count:
+                    page = self.fetch_page(next_page)
+
+                    next_page += 1
+                else:
+                    break
+        finally:
+            for pending_page in pending:
+                pending_page.cancel()
+
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def iterate_keyset(self, key='created', tie_breaker='pk', after=None, on_page=None):
+        # Pages by the last seen (key, tie_breaker) pair instead of page_index,
+        # so the server never has to skip over earlier rows. The remaining
+        # filters (including the recorded__lte snapshot) are kept as-is.
+        #
+        # Iteration starts after the `after` pair when given, and `on_page` is
+        # called with the last pair of each page once its items were consumed.
+
+        last_seen = None
+
+        if after is not None:
+            last_seen = tuple(after)
+
+        while True:
+            query = self.clone()
+            query.order_bys = [(key, tie_breaker)]
+
+            if query.fields:
+                # Projected queries still need the keyset fields to find the next page.
+                query.fields = query.fields + [field for field in (key, tie_breaker) if field not in query.fields]
+
+            if last_seen is not None:
+                # created >= X AND NOT (created == X AND pk <= Y)
+                query.filters.append({key + '__gte': last_seen[0]})
+                query.excludes.append({key: last_seen[0], tie_breaker + '__lte': last_seen[1]})
+
+            response_payload = query.fetch_page(0)
+
+            matches = response_payload['matches']
+
+            for item in matches: # pylint: disable=use-yield-from
+                yield item
+
+            if not matches:
+                break
+
+            last_seen = (matches[-1][key], matches[-1][tie_breaker])
+
+            if on_page is not None:
+                on_page(last_seen)
+
+            if response_payload['count'] <= len(matches):
+                break
+
+    def stream(self, chunk_size=65536):
+        # Iterates over all matches, decoding each page incrementally from the
+        # response body so that memory grows with one point rather than one page.
+
+        url = self.site_url + '/api/data-points.json'
+
+        page_number = 0
+
+        while True:
+            metadata = {}
+
+            response = self.transport.post(url, self.page_payload(page_number), server_timeout=self.timeout, stream=True)
+
+            try:
+                for item in stream_matches(response, metadata, chunk_size=chunk_size):
+                    if self.fields:
+                        item = project_point(item, self.fields)
+
+                    if self.row_type is not None:
+                        item = self.row_type(item)
+
+                    yield item
+            finally:
+                response.close()
+
+            self.total_count = metadata['count']
+            self.page_size = metadata['page_size']
+
+            if self.transport.instrumentation is not None:
+                # Decoding overlaps consumption here, so it has no separate timing.
+                self.transport.instrumentation.emit('page', url=url, page_index=metadata['page_index'], page_size=self.page_size, cache=None, bytes=response_size(response, True), decode_seconds=None)
+
+            if (metadata['page_index'] + 1) * self.page_size >= self.total_count:
+                break
+
+            page_number = metadata['page_index'] + 1
+
+    def iterate_adaptive(self, min_page_size=25, max_page_size=6400, target_seconds=2.0, max_page_bytes=16 * 1024 * 1024):
+        return iterate_adaptive(self, min_page_size=min_page_size, max_page_size=max_page_size, target_seconds=target_seconds, max_page_bytes=max_page_bytes)
+
+    def partition(self, partitions, by='created', sources=None): # pylint: disable=invalid-name
+        return partition_query(self, partitions, by=by, sources=sources)
+
+    def aggregate(self, *aggregates, **named):
+        # query.aggregate(Count(), Min('created'), Max('created')) -> {'count': ..., 'created__min': ..., 'created__max': ...}
+
+        return aggregate_query(self, aggregates, named)
+
+    def values(self, *fields):
+        return PDKValuesQuery(self, fields)
+
+    def histogram(self, field='created', interval=datetime.timedelta(days=1), start=None, end=None, workers=8): # pylint: disable=too-many-arguments, too-many-positional-arguments
+        return histogram_query(self, field=field, interval=interval, start=start, end=end, workers=workers)
+
+    def to_numpy(self, fields=None, timestamps=TIMESTAMP_FIELDS, prefetch=4, workers=4, stats=None): # pylint: disable=too-many-arguments, too-many-positional-arguments
+        # Returns an OrderedDict of field -> numpy array; pass a dict as `stats` to receive timing and peak memory.
+
+        return query_columns(self, fields=fields, timestamps=timestamps, prefetch=prefetch, workers=workers, stats=stats)
+
+    def to_dataframe(self, fields=None, timestamps=TIMESTAMP_FIELDS, prefetch=4, workers=4, stats=None): # pylint: disable=too-many-arguments, too-many-positional-arguments
+        return query_dataframe(self, fields=fields, timestamps=timestamps, prefetch=prefetch, workers=workers, stats=stats)
+
+    def export(self, path, format='jsonl', columns=None, batch_pages=10, resume=True): # pylint: disable=redefined-builtin, too-many-arguments, too-many-positional-arguments
+        return export_query(self, path, export_format=format, columns=columns, batch_pages=batch_pages, resume=resume)
+
+    def page_payload(self, page_number, page_size=None):
+        if page_size is None:
+            page_size = self.page_size
 
         payload = {
             'token': self.token,
-            'page_size': self.page_size,
-            'page_index': self.page_index,
-            'filters': json.dumps(self.filters, cls=DatetimeEncoder),
-            'excludes': json.dumps(self.excludes, cls=DatetimeEncoder),
-            'order_by': json.dumps(self.order_bys, cls=DatetimeEncoder),
+            'page_size': page_size,
+            'page_index': page_number,
         }
 
+        payload.update(serialized_query(self, self.transport.codec))
+
+        return payload
+
+    def fetch_page(self, page_number, page_size=None):
         url = self.site_url + '/api/data-points.json'
 
-        fetch_page = post_request_with_retries(url, payload, server_timeout=self.timeout)
+        response_payload = fetch_cached_page(self.transport, self.page_cache, url, self.page_payload(page_number, page_size), server_timeout=self.timeout, disk_cache=self.disk_cache)
 
-        if fetch_page.status_code == requests.codes.ok:
-            response_payload = fetch_page.json()
+        if self.fields:
+            # Servers without projection support return full points; trim them here.
+            response_payload = dict(response_payload)
+            response_payload['matches'] = [project_point(point, self.fields) for point in response_payload['matches']]
 
-            self.total_count = response_payload['count']
-            self.page_index = response_payload['page_index']
-            self.page_size = response_payload['page_size']
+        if self.row_type is not None:
+            response_payload = dict(response_payload)
+            response_payload['matches'] = [self.row_type(point) for point in response_payload['matches']]
 
-            self.current_page = response_payload['matches']
-        else:
-            fetch_page.raise_for_status()
+        return response_payload
 
-class DatetimeEncoder(json.JSONEncoder):
-    def default(self, o): # pylint: disable=arguments-differ, method-hidden
-        if isinstance(o, datetime.datetime):
-            return o.isoformat()
+    def load_page(self, page_number):
+        self.page_index = page_number
 
-        try:
-            return super(DatetimeEncoder, o).default(o)
-        except TypeError:
-            return str(o)
+        response_payload = self.fetch_page(page_number)
+
+        self.total_count = response_payload['count']
+        self.page_index = response_payload['page_index']
+        self.page_size = response_payload['page_size']
+
+        self.current_page = response_payload['matches']
 
 class PDKDataSourceQuery(object): # pylint: disable=too-many-instance-attributes, useless-object-inheritance
     def __init__(self, token, site_url, timeout, *args, **kwargs): # pylint: disable=unused-argument
@@ -309,6 +736,13 @@ class PDKDataSourceQuery(object): # pylint: disable=too-many-instance-attributes
         self.site_url = site_url
         self.timeout = timeout
 
+        self.transport = kwargs.pop('transport', None)
+
+        if self.transport is None:
+            self.transport = PDKTransport()
+
+        self.page_cache = kwargs.pop('page_cache', None)
+
         page_size = PDK_API_DEFAULT_PAGE_SIZE
 
         if 'page_size' in kwargs:
@@ -330,34 +764,33 @@ class PDKDataSourceQuery(object): # pylint: disable=too-many-instance-attributes
 
         self.current_page = None
 
-    def filter(self, **kwargs):
-        query = PDKDataSourceQuery(self.token, self.site_url, self.timeout, page_size=self.page_size)
+        self.serialized = None
+
+    def clone(self):
+        query = PDKDataSourceQuery(self.token, self.site_url, self.timeout, page_size=self.page_size, transport=self.transport, page_cache=self.page_cache)
 
         query.filters = list(self.filters)
         query.excludes = list(self.excludes)
         query.order_bys = list(self.order_bys)
 
+        return query
+
+    def filter(self, **kwargs):
+        query = self.clone()
+
         query.filters.append(kwargs)
 
         return query
 
     def exclude(self, **kwargs):
-        query = PDKDataSourceQuery(self.token, self.site_url, self.timeout, page_size=self.page_size)
-
-        query.filters = list(self.filters)
-        query.excludes = list(self.excludes)
-        query.order_bys = list(self.order_bys)
+        query = self.clone()
 
         query.excludes.append(kwargs)
 
         return query
 
     def order_by(self, *args):
-        query = PDKDataSourceQuery(self.token, self.site_url, self.timeout, page_size=self.page_size)
-
-        query.filters = list(self.filters)
-        query.excludes = list(self.excludes)
-        query.order_bys = list(self.order_bys)
+        query = self.clone()
 
         query.order_bys.append(args)
 
@@ -367,7 +800,10 @@ class PDKDataSourceQuery(object): # pylint: disable=too-many-instance-attributes
         if self.total_count is not None:
             return self.total_count
 
-        self.load_page(0)
+        # A single-item page is enough to learn the total without transferring a full page of matches.
+        response_payload = self.fetch_page(0, page_size=1)
+
+        self.total_count = response_payload['count']
 
         return self.total_count
 
@@ -409,40 +845,57 @@ class PDKDataSourceQuery(object): # pylint: disable=too-many-instance-attributes
 
             return self.current_page[index % self.page_size]
         elif isinstance(slice_item, slice):
-            logging.error('SLICE NOT YET SUPPORTED: %s', str(slice_item))
+            return PDKQuerySlice(self, slice_item)
 
         return []
 
     def first(self):
-        return self[0]
+        response_payload = self.fetch_page(0, page_size=1)
+
+        self.total_count = response_payload['count']
+
+        if response_payload['matches']:
+            return response_payload['matches'][0]
+
+        return None
 
     def last(self):
-        return self[-1]
+        matches = self.latest(1)
 
-    def load_page(self, page_number):
-        self.page_index = page_number
+        if matches:
+            return matches[0]
+
+        return None
+
+    def latest(self, count=1):
+        return fetch_latest(self, count)
+
+    def fetch_page(self, page_number, page_size=None):
+        if page_size is None:
+            page_size = self.page_size
 
         payload = {
             'token': self.token,
-            'page_size': self.page_size,
-            'page_index': self.page_index,
-            'filters': json.dumps(self.filters, cls=DatetimeEncoder),
-            'excludes': json.dumps(self.excludes, cls=DatetimeEncoder),
-            'order_by': json.dumps(self.order_bys, cls=DatetimeEncoder),
+            'page_size': page_size,
+            'page_index': page_number,
         }
 
-        fetch_page = post_request_with_retries(self.site_url + '/api/data-sources.json', payload, server_timeout=self.timeout)
+        payload.update(serialized_query(self, self.transport.codec))
 
-        if fetch_page.status_code == requests.codes.ok:
-            response_payload = fetch_page.json()
+        url = self.site_url + '/api/data-sources.json'
 
-            self.total_count = response_payload['count']
-            self.page_index = response_payload['page_index']
-            self.page_size = response_payload['page_size']
+        return fetch_cached_page(self.transport, self.page_cache, url, payload, server_timeout=self.timeout)
 
-            self.current_page = response_payload['matches']
-        else:
-            fetch_page.raise_for_status()
+    def load_page(self, page_number):
+        self.page_index = page_number
+
+        response_payload = self.fetch_page(page_number)
+
+        self.total_count = response_payload['count']
+        self.page_index = response_payload['page_index']
+        self.page_size = response_payload['page_size']
+
+        self.current_page = response_payload['matches']
 
 class PDKDataSourceUpdate(object): # pylint: disable=too-many-instance-attributes, useless-object-inheritance
     def __init__(self, token, site_url, timeout, *args, **kwargs): # pylint: disable=unused-argument
@@ -450,6 +903,14 @@ class PDKDataSourceUpdate(object): # pylint: disable=too-many-instance-attribute
         self.site_url = site_url
         self.timeout = timeout
 
+        self.transport = kwargs.pop('transport', None)
+
+        if self.transport is None:
+            self.transport = PDKTransport()
+
+        # Cached data source pages are dropped after every update.
+        self.page_cache = kwargs.pop('page_cache', None)
+
         self.filters = []
         self.excludes = []
         self.updates = []
@@ -459,34 +920,31 @@ class PDKDataSourceUpdate(object): # pylint: disable=too-many-instance-attribute
 
         self.total_updated = 0
 
-    def filter(self, **kwargs):
-        query = PDKDataSourceUpdate(self.token, self.site_url, self.timeout)
+    def clone(self):
+        query = PDKDataSourceUpdate(self.token, self.site_url, self.timeout, transport=self.transport, page_cache=self.page_cache)
 
         query.filters = list(self.filters)
         query.excludes = list(self.excludes)
         query.updates = list(self.updates)
 
+        return query
+
+    def filter(self, **kwargs):
+        query = self.clone()
+
         query.filters.append(kwargs)
 
         return query
 
     def exclude(self, **kwargs):
-        query = PDKDataSourceUpdate(self.token, self.site_url, self.timeout)
-
-        query.filters = list(self.filters)
-        query.excludes = list(self.excludes)
-        query.updates = list(self.updates)
+        query = self.clone()
 
         query.excludes.append(kwargs)
 
         return query
 
     def update(self, **kwargs):
-        query = PDKDataSourceUpdate(self.token, self.site_url, self.timeout)
-
-        query.filters = list(self.filters)
-        query.excludes = list(self.excludes)
-        query.updates = list(self.updates)
+        query = self.clone()
 
         query.updates.append(kwargs)
 
@@ -495,15 +953,28 @@ class PDKDataSourceUpdate(object): # pylint: disable=too-many-instance-attribute
     def updated(self):
         return self.total_updated
 
+    def bulk(self, changes, chunk_size=100, workers=4):
+        # changes: {identifier: {field: value}} or [(filters, {field: value}), ...]. Returns one result dict per chunk.
+
+        results = bulk_update(self, changes, chunk_size=chunk_size, workers=workers)
+
+        self.total_updated = sum(result['updated'] for result in results)
+
+        return results
+
     def execute(self): # pylint: disable=inconsistent-return-statements
         payload = {
             'token': self.token,
-            'filters': json.dumps(self.filters, cls=DatetimeEncoder),
-            'excludes': json.dumps(self.excludes, cls=DatetimeEncoder),
-            'updates': json.dumps(self.updates, cls=DatetimeEncoder),
+            'filters': self.transport.codec.dumps(self.filters),
+            'excludes': self.transport.codec.dumps(self.excludes),
+            'updates': self.transport.codec.dumps(self.updates),
         }
 
-        response = post_request_with_retries(self.site_url + '/api/data-sources/update.json', payload, server_timeout=self.timeout)
+        try:
+            response = self.transport.post(self.site_url + '/api/data-sources/update.json', payload, server_timeout=self.timeout)
+        finally:
+            if self.page_cache is not None:
+                self.page_cache.clear(self.site_url + '/api/data-sources.json')
 
         if response.status_code == requests.codes.ok:
             response_payload = response.json()
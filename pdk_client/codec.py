@@ -0,0 +1,111 @@
+# pylint: disable=line-too-long, no-member
+# -*- coding: utf-8 -*-
+
+# JSON encoding and decoding used for request payloads and page responses.
+# Pages are decoded with orjson or ujson when installed (orjson preferred),
+# falling back to the standard library. Request payloads are small and encoded
+# once per query, so every codec encodes them with the standard library: the
+# filters sent to the server (and the cache keys built from them) are the same
+# byte for byte whichever codec is installed.
+
+from builtins import str, object # pylint: disable=redefined-builtin
+
+import datetime
+import decimal
+import json
+import uuid
+
+JSON_CODECS = ('orjson', 'ujson', 'json')
+
+def encode_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+
+    # Anything else (arrow objects, ...) is sent as its string form.
+    return str(value)
+
+class DatetimeEncoder(json.JSONEncoder):
+    def default(self, o): # pylint: disable=arguments-differ, method-hidden
+        return encode_default(o)
+
+class PDKJSONCodec(object): # pylint: disable=useless-object-inheritance
+    name = 'json'
+
+    def loads(self, content): # pylint: disable=no-self-use
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+
+        return json.loads(content)
+
+    def dumps(self, value): # pylint: disable=no-self-use
+        return json.dumps(value, cls=DatetimeEncoder)
+
+class PDKOrjsonCodec(PDKJSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson # pylint: disable=import-outside-toplevel, import-error
+
+        self.orjson = orjson
+
+    def loads(self, content):
+        return self.orjson.loads(content)
+
+class PDKUjsonCodec(PDKJSONCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson # pylint: disable=import-outside-toplevel, import-error
+
+        self.ujson = ujson
+
+    def loads(self, content):
+        return self.ujson.loads(content)
+
+CODEC_CLASSES = {
+    'orjson': PDKOrjsonCodec,
+    'ujson': PDKUjsonCodec,
+    'json': PDKJSONCodec,
+}
+
+def json_codec(codec=None):
+    # None picks the fastest installed codec; a name requires that codec; codec objects pass through.
+
+    if codec is None:
+        for name in JSON_CODECS:
+            try:
+                return CODEC_CLASSES[name]()
+            except ImportError:
+                pass
+
+    if isinstance(codec, PDKJSONCodec):
+        return codec
+
+    if codec not in CODEC_CLASSES:
+        raise ValueError('Unsupported JSON codec: %s (expected one of %s)' % (codec, ', '.join(JSON_CODECS))) # pylint: disable=consider-using-f-string
+
+    return CODEC_CLASSES[codec]()
+
+def serialized_query(query, codec):
+    # filters / excludes / order_by (and fields) serialized once per query
+    # object and reused for every page. The cached strings are rebuilt if
+    # those lists change, as they do right after clone() in filter() etc.
+
+    current = [query.filters, query.excludes, query.order_bys, getattr(query, 'fields', None)]
+
+    if query.serialized is None or query.serialized[0] != current:
+        serialized = {
+            'filters': codec.dumps(query.filters),
+            'excludes': codec.dumps(query.excludes),
+            'order_by': codec.dumps(query.order_bys),
+        }
+
+        if current[3]:
+            serialized['fields'] = codec.dumps(current[3])
+
+        query.serialized = ([list(value) if value is not None else None for value in current], serialized)
+
+    return query.serialized[1]
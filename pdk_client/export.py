@@ -0,0 +1,288 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Bulk export of query results to CSV, JSON Lines or Parquet (pyarrow). Pages
+# are written in batches as they arrive, and progress is recorded next to the
+# output so that an interrupted export resumes at the next unwritten page.
+
+from builtins import str, object # pylint: disable=redefined-builtin
+
+import csv
+import io
+import json
+import os
+
+from .codec import DatetimeEncoder
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+def flatten_point(point, prefix='', flat=None):
+    # {'properties': {'passive-data-metadata': {'source': 'x'}}} -> {'properties.passive-data-metadata.source': 'x'}
+
+    if flat is None:
+        flat = {}
+
+    for key, value in point.items():
+        name = prefix + key
+
+        if isinstance(value, dict):
+            flatten_point(value, name + '.', flat)
+        else:
+            flat[name] = value
+
+    return flat
+
+def infer_columns(rows):
+    columns = []
+    seen = set()
+
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+
+    return columns
+
+def scalar_value(value):
+    if isinstance(value, (list, tuple)):
+        return json.dumps(value)
+
+    return value
+
+class PDKJSONLinesWriter(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, path, columns, offset=0):
+        self.columns = columns
+        self.output = io.open(path, 'ab' if offset else 'wb') # pylint: disable=consider-using-with
+
+        if offset:
+            self.output.truncate(offset)
+            self.output.seek(offset)
+
+    def write(self, rows):
+        lines = []
+
+        for row in rows:
+            if self.columns is not None:
+                row = dict((column, row.get(column, None)) for column in self.columns)
+
+            lines.append(json.dumps(row))
+
+        if lines:
+            self.output.write(('\n'.join(lines) + '\n').encode('utf-8'))
+
+        self.output.flush()
+
+        return self.output.tell()
+
+    def close(self):
+        self.output.close()
+
+class PDKCSVWriter(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, path, columns, offset=0):
+        self.columns = columns
+
+        self.output = io.open(path, 'r+' if offset else 'w', newline='', encoding='utf-8') # pylint: disable=consider-using-with
+
+        if offset:
+            self.output.seek(offset)
+            self.output.truncate(offset)
+
+        self.writer = csv.writer(self.output)
+
+        if not offset:
+            self.writer.writerow(columns)
+
+    def write(self, rows):
+        for row in rows:
+            self.writer.writerow([scalar_value(row.get(column, None)) for column in self.columns])
+
+        self.output.flush()
+
+        return self.output.tell()
+
+    def close(self):
+        self.output.close()
+
+class PDKParquetWriter(object): # pylint: disable=useless-object-inheritance
+    # Writes one Parquet file per batch of pages into the `path` directory, so
+    # completed parts survive an interrupted export.
+
+    def __init__(self, path, columns, part=0):
+        try:
+            import pyarrow.parquet # pylint: disable=import-outside-toplevel
+        except ImportError:
+            raise ImportError('Parquet export requires the pyarrow package (pip install pyarrow).') # pylint: disable=raise-missing-from
+
+        self.pyarrow = pyarrow
+
+        self.path = path
+        self.columns = columns
+        self.part = part
+        self.schema = None
+
+        if os.path.isdir(path) is False:
+            os.makedirs(path)
+
+        for filename in os.listdir(path):
+            if filename.startswith('part-') and int(filename[5:10]) >= part:
+                os.remove(os.path.join(path, filename))
+
+        if part > 0:
+            self.schema = self.pyarrow.parquet.read_schema(self.part_path(0))
+
+    def part_path(self, part):
+        return os.path.join(self.path, 'part-%05d.parquet' % part) # pylint: disable=consider-using-f-string
+
+    def column_array(self, column, values):
+        values = [scalar_value(value) for value in values]
+
+        if self.schema is not None:
+            field_type = self.schema.field(column).type
+
+            # pyarrow.array(values, type=...) truncates 50.5 to 50 in an int64
+            # column, so values are converted on their own and cast safely.
+            try:
+                return self.pyarrow.array(values).cast(field_type)
+            except (self.pyarrow.ArrowInvalid, self.pyarrow.ArrowTypeError, self.pyarrow.ArrowNotImplementedError):
+                if self.pyarrow.types.is_string(field_type):
+                    return self.pyarrow.array([None if value is None else str(value) for value in values], type=self.pyarrow.string())
+
+            raise ValueError('Field "%s" was written as %s, but a later page has values that do not fit that type; export it as JSON Lines or CSV instead.' % (column, field_type)) # pylint: disable=consider-using-f-string
+
+        array = self.pyarrow.array(values)
+
+        if self.pyarrow.types.is_null(array.type):
+            array = array.cast(self.pyarrow.string())
+
+        return array
+
+    def write(self, rows):
+        if not rows:
+            return self.part
+
+        arrays = [self.column_array(column, [row.get(column, None) for row in rows]) for column in self.columns]
+
+        table = self.pyarrow.Table.from_arrays(arrays, names=self.columns)
+
+        if self.schema is None:
+            self.schema = table.schema
+        else:
+            table = table.cast(self.schema)
+
+        self.pyarrow.parquet.write_table(table, self.part_path(self.part))
+
+        self.part += 1
+
+        return self.part
+
+    def close(self):
+        pass
+
+def export_signature(query, export_format, columns):
+    # Everything that decides which rows land where; a progress file written
+    # for any other query (or format, page size or columns) is not resumed.
+
+    return json.loads(json.dumps({
+        'format': export_format,
+        'page_size': query.page_size,
+        'filters': query.filters,
+        'excludes': query.excludes,
+        'order_by': query.order_bys,
+        'fields': getattr(query, 'fields', None),
+        'columns': columns,
+    }, cls=DatetimeEncoder))
+
+def check_columns(rows, known):
+    for row in rows:
+        for key in row:
+            if key not in known:
+                raise ValueError('Field "%s" first appears after the columns were taken from the first page; pass columns=[...] to export it.' % key) # pylint: disable=consider-using-f-string
+
+def export_query(query, path, export_format='jsonl', columns=None, batch_pages=10, resume=True): # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals, too-many-branches
+    # JSON Lines rows are written as-is unless `columns` is given. CSV and
+    # Parquet need their columns up front: without `columns`, they are taken
+    # from the first page and a field first seen on a later page raises
+    # ValueError instead of being dropped.
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError('Unsupported export format: %s (expected one of %s)' % (export_format, ', '.join(EXPORT_FORMATS))) # pylint: disable=consider-using-f-string
+
+    progress_path = path.rstrip(os.sep) + '.progress.json'
+
+    signature = export_signature(query, export_format, columns)
+
+    progress = None
+
+    if resume and os.path.exists(progress_path):
+        with io.open(progress_path, encoding='utf-8') as progress_file:
+            progress = json.load(progress_file)
+
+    first_page = query.fetch_page(0)
+
+    page_size = first_page['page_size']
+    page_count = (first_page['count'] + page_size - 1) // page_size if page_size else 0
+
+    if progress is not None and (progress.get('query') != signature or progress.get('count') != first_page['count'] or progress.get('next_page', 0) > page_count):
+        progress = None
+
+    known_columns = None
+
+    if columns is None and export_format != 'jsonl':
+        if progress is not None:
+            columns = progress['columns']
+        else:
+            columns = infer_columns(flatten_point(point) for point in first_page['matches'])
+
+        known_columns = set(columns)
+
+    next_page = 0
+    position = 0
+
+    if progress is not None:
+        next_page = progress['next_page']
+        position = progress['position']
+
+    if export_format == 'parquet':
+        writer = PDKParquetWriter(path, columns, part=position)
+    elif export_format == 'csv':
+        writer = PDKCSVWriter(path, columns, offset=position)
+    else:
+        writer = PDKJSONLinesWriter(path, columns, offset=position)
+
+    written = 0
+
+    try:
+        while next_page < page_count:
+            rows = []
+
+            last_page = min(page_count, next_page + batch_pages)
+
+            for page_number in range(next_page, last_page):
+                page = first_page if page_number == 0 else query.fetch_page(page_number)
+
+                rows.extend(flatten_point(point) for point in page['matches'])
+
+            if known_columns is not None:
+                check_columns(rows, known_columns)
+
+            position = writer.write(rows)
+            written += len(rows)
+
+            next_page = last_page
+
+            with io.open(progress_path, 'w', encoding='utf-8') as progress_file:
+                progress_file.write(str(json.dumps({
+                    'query': signature,
+                    'count': first_page['count'],
+                    'next_page': next_page,
+                    'position': position,
+                    'columns': columns,
+                })))
+    finally:
+        writer.close()
+
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    return written
@@ -0,0 +1,245 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Splits a data point query into disjoint partitions (by created time or by
+# source) and extracts them in parallel, either as one merged stream (threads)
+# or as a set of output shards (processes).
+
+from builtins import object, range # pylint: disable=redefined-builtin
+
+import os
+import threading
+
+from concurrent import futures
+from queue import Queue, Empty, Full
+
+import arrow
+
+def count_queries(queries, workers=8):
+    queries = list(queries)
+
+    if not queries:
+        return []
+
+    executor = futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(queries))))
+
+    try:
+        return list(executor.map(lambda query: query.count(), queries))
+    finally:
+        executor.shutdown(wait=False)
+
+def partition_by_created(query, partitions, resolution=4): # pylint: disable=too-many-locals
+    # Cuts [min(created), max(created)] into partitions * resolution equal time
+    # buckets, counts them, then merges adjacent buckets into `partitions`
+    # groups holding roughly the same number of points.
+
+    from .aggregates import server_extreme, Min, Max # pylint: disable=import-outside-toplevel, cyclic-import
+
+    # The bounds replace any ordering of `query`, which would otherwise pick
+    # the first point of that ordering instead of the earliest / latest one.
+
+    earliest = server_extreme(query, Min('created'))
+
+    if earliest is None:
+        return [query]
+
+    latest = server_extreme(query, Max('created'))
+
+    start = arrow.get(earliest).datetime
+    end = arrow.get(latest).datetime
+
+    bucket_count = max(1, partitions * resolution)
+    step = (end - start) / bucket_count
+
+    if not step:
+        return [query]
+
+    bounds = [start + (step * index) for index in range(bucket_count)] + [end]
+
+    buckets = []
+
+    for index in range(bucket_count):
+        if index == bucket_count - 1:
+            buckets.append((bounds[index], None))
+        else:
+            buckets.append((bounds[index], bounds[index + 1]))
+
+    counts = count_queries(created_range_query(query, lower, upper, end) for lower, upper in buckets)
+
+    target = float(sum(counts)) / partitions
+
+    groups = []
+    group_start = None
+    group_count = 0
+
+    for (lower, upper), count in zip(buckets, counts):
+        if group_start is None:
+            group_start = lower
+
+        group_count += count
+
+        if upper is None or (group_count >= target and len(groups) < partitions - 1):
+            groups.append((group_start, upper))
+
+            group_start = None
+            group_count = 0
+
+    return [created_range_query(query, lower, upper, end) for lower, upper in groups]
+
+def created_range_query(query, lower, upper, end):
+    if upper is None:
+        return query.filter(created__gte=lower, created__lte=end)
+
+    return query.filter(created__gte=lower, created__lt=upper)
+
+def partition_by_source(query, partitions, sources=None):
+    if sources is None:
+        from .client import PDKDataSourceQuery # pylint: disable=import-outside-toplevel, cyclic-import
+
+        source_query = PDKDataSourceQuery(query.token, query.site_url, query.timeout, transport=query.transport).exclude(pk=None)
+
+        sources = [source['identifier'] for source in source_query]
+
+    if not sources:
+        return [query]
+
+    groups = [sources[index::partitions] for index in range(min(partitions, len(sources)))]
+
+    return [query.filter(source__in=group) for group in groups]
+
+def partition_query(query, partitions, by='created', sources=None): # pylint: disable=invalid-name
+    if partitions <= 1:
+        return [query]
+
+    if by == 'created':
+        return partition_by_created(query, partitions)
+
+    if by == 'source':
+        return partition_by_source(query, partitions, sources=sources)
+
+    raise ValueError('Unsupported partitioning: %s (expected "created" or "source")' % by) # pylint: disable=consider-using-f-string
+
+class PDKExtraction(object): # pylint: disable=useless-object-inheritance, too-few-public-methods
+    # Iterates the partitions on a thread pool and merges their points into a
+    # single stream. Each partition buffers at most `buffer_size` points; when
+    # `ordered` is set, partitions are yielded one after another in order.
+
+    def __init__(self, queries, workers=None, ordered=False, buffer_size=1000):
+        self.queries = list(queries)
+        self.workers = workers or len(self.queries)
+        self.ordered = ordered
+        self.buffer_size = buffer_size
+
+    def put(self, buffer, entry, stop): # pylint: disable=no-self-use
+        while stop.is_set() is False:
+            try:
+                buffer.put(entry, timeout=0.1)
+
+                return True
+            except Full:
+                pass
+
+        return False
+
+    def run(self, query, buffer, stop):
+        error = None
+
+        try:
+            # A clone, so every run starts at the first page of the partition.
+            for item in query.clone():
+                if self.put(buffer, ('item', item), stop) is False:
+                    return
+        except Exception as exception: # pylint: disable=broad-exception-caught
+            error = exception
+
+        self.put(buffer, ('done', error), stop)
+
+    def __iter__(self):
+        # Each iteration runs the partitions again with its own stop signal.
+        stop = threading.Event()
+
+        if self.ordered:
+            buffers = [Queue(self.buffer_size) for query in self.queries]
+        else:
+            shared = Queue(self.buffer_size)
+            buffers = [shared for query in self.queries]
+
+        executor = futures.ThreadPoolExecutor(max_workers=max(1, self.workers))
+
+        try:
+            for query, buffer in zip(self.queries, buffers):
+                executor.submit(self.run, query, buffer, stop)
+
+            remaining = len(self.queries)
+            position = 0
+
+            while remaining > 0:
+                try:
+                    kind, value = buffers[position].get(timeout=0.1)
+                except Empty:
+                    continue
+
+                if kind == 'item':
+                    yield value
+                else:
+                    if value is not None:
+                        raise value
+
+                    remaining -= 1
+
+                    if self.ordered:
+                        position += 1
+        finally:
+            stop.set()
+
+            executor.shutdown(wait=False)
+
+def query_spec(query):
+    token = query.token
+
+    if query.transport.tokens is not None:
+        token = query.transport.tokens.current()
+
+    return {
+        'token': token,
+        'site_url': query.site_url,
+        'timeout': query.timeout,
+        'page_size': query.page_size,
+        'filters': query.filters,
+        'excludes': query.excludes,
+        'order_bys': query.order_bys,
+        'fields': query.fields,
+        'row_type': query.row_type,
+    }
+
+def export_shard(spec, path, export_format, columns):
+    # Runs in a worker process, so the query is rebuilt from a plain spec with a fresh transport.
+
+    from .client import PDKDataPointQuery # pylint: disable=import-outside-toplevel, cyclic-import
+
+    query = PDKDataPointQuery(spec['token'], spec['site_url'], spec['timeout'], page_size=spec['page_size'], row_type=spec['row_type'])
+
+    query.filters = spec['filters']
+    query.excludes = spec['excludes']
+    query.order_bys = spec['order_bys']
+    query.fields = spec['fields']
+
+    return query.export(path, format=export_format, columns=columns)
+
+def extract_shards(queries, directory, export_format='jsonl', columns=None, workers=None, processes=True): # pylint: disable=too-many-arguments, too-many-positional-arguments
+    queries = list(queries)
+
+    if os.path.isdir(directory) is False:
+        os.makedirs(directory)
+
+    if processes:
+        executor = futures.ProcessPoolExecutor(max_workers=workers or len(queries))
+    else:
+        executor = futures.ThreadPoolExecutor(max_workers=workers or len(queries))
+
+    paths = [os.path.join(directory, 'shard-%05d.%s' % (index, export_format)) for index in range(len(queries))] # pylint: disable=consider-using-f-string
+
+    with executor:
+        written = list(executor.map(export_shard, [query_spec(query) for query in queries], paths, [export_format] * len(queries), [columns] * len(queries)))
+
+    return list(zip(paths, written))
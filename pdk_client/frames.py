@@ -0,0 +1,213 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Materializes query results as NumPy column arrays or a pandas DataFrame.
+# Each page is decoded straight into per-field column buffers that double in
+# capacity as they fill, and ISO 8601 timestamps are converted to datetime64
+# in bulk rather than parsed one value at a time with arrow.
+
+from builtins import object # pylint: disable=redefined-builtin
+
+import collections
+import logging
+import time
+
+from .export import flatten_point, infer_columns
+from .projection import field_value
+
+TIMESTAMP_FIELDS = ('created', 'recorded')
+
+def import_numpy():
+    try:
+        import numpy # pylint: disable=import-outside-toplevel
+    except ImportError:
+        raise ImportError('to_numpy() requires the numpy package (pip install numpy).') # pylint: disable=raise-missing-from
+
+    return numpy
+
+def process_peak_rss_bytes():
+    # Peak resident set size of the whole process since it started, not of a
+    # single call: ru_maxrss only grows. Returns None where resource is missing.
+
+    try:
+        import resource # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def parse_timestamps(numpy, values):
+    # '2020-01-01T00:00:00.123+02:00' -> datetime64[us] in UTC. Offsets are
+    # split off with string slicing and applied as one vectorized subtraction.
+
+    bases = []
+    offsets = []
+
+    offset_minutes = {}
+
+    for value in values:
+        if value is None:
+            bases.append('NaT')
+            offsets.append(0)
+        elif value.endswith('Z'):
+            bases.append(value[:-1])
+            offsets.append(0)
+        elif len(value) > 19 and value[-6] in '+-' and value[-3] == ':':
+            suffix = value[-6:]
+
+            if suffix not in offset_minutes:
+                minutes = int(suffix[1:3]) * 60 + int(suffix[4:6])
+
+                offset_minutes[suffix] = -minutes if suffix[0] == '-' else minutes
+
+            bases.append(value[:-6])
+            offsets.append(offset_minutes[suffix])
+        else:
+            bases.append(value)
+            offsets.append(0)
+
+    parsed = numpy.array(bases, dtype='datetime64[us]')
+
+    if offset_minutes:
+        parsed = parsed - numpy.array(offsets, dtype='timedelta64[m]')
+
+    return parsed
+
+def column_array(numpy, values, timestamp=False):
+    if timestamp:
+        return parse_timestamps(numpy, values)
+
+    array = numpy.array(values)
+
+    if array.dtype.kind == 'O':
+        # Integers or floats with missing values: store as float64 with NaN.
+        present = numpy.array([value for value in values if value is not None])
+
+        if present.dtype.kind in 'iuf':
+            return numpy.array(values, dtype='float64')
+
+    if array.ndim != 1:
+        # Lists of equal length would otherwise become a 2-D array.
+        array = numpy.empty(len(values), dtype='O')
+        array[:] = values
+
+    if array.dtype.kind == 'U':
+        # Strings stay Python objects rather than fixed-width unicode buffers.
+        array = array.astype('O')
+
+    return array
+
+class PDKColumnBuffer(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, numpy, capacity):
+        self.numpy = numpy
+        self.capacity = max(1, capacity)
+        self.array = None
+        self.size = 0
+
+    @property
+    def nbytes(self):
+        return 0 if self.array is None else self.array.nbytes
+
+    def append(self, values):
+        count = len(values)
+
+        if self.array is None:
+            self.array = self.numpy.empty(max(self.capacity, count), dtype=values.dtype)
+        elif values.dtype != self.array.dtype:
+            try:
+                common = self.numpy.result_type(self.array.dtype, values.dtype)
+            except TypeError:
+                common = self.numpy.dtype('O')
+
+            self.array = self.array.astype(common)
+
+        if self.size + count > len(self.array):
+            capacity = len(self.array)
+
+            while self.size + count > capacity:
+                capacity *= 2
+
+            grown = self.numpy.empty(capacity, dtype=self.array.dtype)
+            grown[:self.size] = self.array[:self.size]
+
+            self.array = grown
+
+        self.array[self.size:self.size + count] = values
+        self.size += count
+
+    def result(self):
+        if self.array is None:
+            return self.numpy.empty(0, dtype='O')
+
+        if len(self.array) == self.size:
+            return self.array
+
+        return self.array[:self.size].copy()
+
+def query_columns(query, fields=None, timestamps=TIMESTAMP_FIELDS, prefetch=4, workers=4, stats=None): # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals
+    numpy = import_numpy()
+
+    started = time.time()
+
+    if fields:
+        query = query.only(*fields)
+
+    buffers = collections.OrderedDict()
+    peak_bytes = 0
+    page_count = 0
+    point_count = 0
+
+    for page in query.iterate_pages(prefetch=prefetch, workers=workers):
+        matches = page['matches']
+
+        # Without explicit fields, every page may add columns. Fields first seen
+        # on a later page are backfilled with None for the earlier points.
+        for field in (fields if fields is not None else infer_columns(flatten_point(point) for point in matches)):
+            if field not in buffers:
+                buffers[field] = PDKColumnBuffer(numpy, page['count'])
+
+                if point_count > 0:
+                    buffers[field].append(column_array(numpy, [None] * point_count, timestamp=field in timestamps))
+
+        for field, buffer in buffers.items():
+            if '.' in field:
+                values = [field_value(point, field) for point in matches]
+            else:
+                values = [point.get(field, None) for point in matches]
+
+            if values:
+                buffer.append(column_array(numpy, values, timestamp=field in timestamps))
+
+        page_count += 1
+        point_count += len(matches)
+        peak_bytes = max(peak_bytes, sum(buffer.nbytes for buffer in buffers.values()))
+
+    columns = collections.OrderedDict((field, buffer.result()) for field, buffer in buffers.items())
+
+    if stats is not None:
+        stats['pages'] = page_count
+        stats['points'] = point_count
+        stats['seconds'] = time.time() - started
+        stats['peak_buffer_bytes'] = peak_bytes
+        stats['process_peak_rss_bytes'] = process_peak_rss_bytes()
+
+        logging.debug('Materialized %d points from %d pages in %.3f seconds (peak buffers: %d bytes)', stats['points'], page_count, stats['seconds'], peak_bytes)
+
+    return columns
+
+def query_dataframe(query, fields=None, timestamps=TIMESTAMP_FIELDS, prefetch=4, workers=4, stats=None): # pylint: disable=too-many-arguments, too-many-positional-arguments
+    try:
+        import pandas # pylint: disable=import-outside-toplevel
+    except ImportError:
+        raise ImportError('to_dataframe() requires the pandas package (pip install pandas).') # pylint: disable=raise-missing-from
+
+    columns = query_columns(query, fields=fields, timestamps=timestamps, prefetch=prefetch, workers=workers, stats=stats)
+
+    frame = pandas.DataFrame(columns, copy=False)
+
+    for field in columns:
+        if field in timestamps:
+            frame[field] = frame[field].dt.tz_localize('UTC')
+
+    return frame
@@ -0,0 +1,29 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# last() and latest(n) for data point and data source queries: the final
+# matches of a query, fetched without walking it from the first page.
+
+def reverse_order_bys(order_bys):
+    return [tuple((field[1:] if field.startswith('-') else '-' + field) for field in fields) for fields in order_bys]
+
+def fetch_latest(query, count=1):
+    # Returns the last `count` matches of `query`, last match first. With an
+    # explicit ordering this is a single request for the first `count` items
+    # of the reversed ordering; otherwise the tail is located by count().
+
+    if query.order_bys:
+        reversed_query = query.clone()
+        reversed_query.order_bys = reverse_order_bys(query.order_bys)
+
+        return reversed_query.fetch_page(0, page_size=count)['matches']
+
+    total_count = query.count()
+
+    if total_count == 0:
+        return []
+
+    if count == 1:
+        return query.fetch_page(total_count - 1, page_size=1)['matches']
+
+    return list(reversed(list(query[max(0, total_count - count):total_count])))
@@ -0,0 +1,171 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Instrumentation for requests issued through a PDKTransport. Listeners are
+# plain callables receiving one dict per event:
+#
+#   request - url, status, seconds (including retries), retries, bytes
+#   retry   - url, error, delay
+#   failure - url, error, retries (the request gave up, or failed without retrying)
+#   page    - url, page_index, page_size, cache ('memory', 'disk' or None), bytes, decode_seconds
+#
+# Without a PDKInstrumentation on the transport, no events are built at all.
+
+from builtins import object # pylint: disable=redefined-builtin
+
+import bisect
+import collections
+import logging
+import math
+import threading
+
+DEFAULT_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEFAULT_BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+class PDKInstrumentation(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, *listeners):
+        self.listeners = list(listeners)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+        return listener
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def emit(self, event, **fields):
+        fields['event'] = event
+
+        for listener in self.listeners:
+            try:
+                listener(fields)
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.exception('Instrumentation listener failed on %s event', event)
+
+class PDKHistogram(object): # pylint: disable=useless-object-inheritance
+    # Cumulative buckets for export, plus a window of recent samples for percentiles.
+
+    def __init__(self, buckets, samples=10000):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.samples = collections.deque(maxlen=samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent):
+        if not self.samples:
+            return None
+
+        ordered = sorted(self.samples)
+
+        # Nearest-rank percentile.
+        index = min(len(ordered) - 1, max(0, int(math.ceil(percent / 100.0 * len(ordered))) - 1))
+
+        return ordered[index]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': (self.total / self.count) if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': max(self.samples) if self.samples else None,
+        }
+
+class PDKStatsCollector(object): # pylint: disable=useless-object-inheritance
+    # In-memory listener: counters and latency / size / decode histograms.
+
+    def __init__(self, samples=10000):
+        self.lock = threading.Lock()
+
+        self.counters = collections.OrderedDict((name, 0) for name in ('requests', 'retries', 'failures', 'bytes', 'pages', 'memory_cache_hits', 'disk_cache_hits', 'cache_misses'))
+
+        self.histograms = collections.OrderedDict([
+            ('request_seconds', PDKHistogram(DEFAULT_SECONDS_BUCKETS, samples)),
+            ('decode_seconds', PDKHistogram(DEFAULT_SECONDS_BUCKETS, samples)),
+            ('response_bytes', PDKHistogram(DEFAULT_BYTES_BUCKETS, samples)),
+        ])
+
+    def __call__(self, event):
+        kind = event['event']
+
+        with self.lock:
+            if kind == 'request':
+                self.counters['requests'] += 1
+                self.counters['retries'] += event['retries']
+                self.histograms['request_seconds'].observe(event['seconds'])
+
+                if event['bytes'] is not None:
+                    self.counters['bytes'] += event['bytes']
+                    self.histograms['response_bytes'].observe(event['bytes'])
+            elif kind == 'failure':
+                self.counters['failures'] += 1
+                self.counters['retries'] += event['retries']
+            elif kind == 'page':
+                self.counters['pages'] += 1
+
+                if event['cache'] == 'memory':
+                    self.counters['memory_cache_hits'] += 1
+                elif event['cache'] == 'disk':
+                    self.counters['disk_cache_hits'] += 1
+                else:
+                    self.counters['cache_misses'] += 1
+
+                if event['decode_seconds'] is not None:
+                    self.histograms['decode_seconds'].observe(event['decode_seconds'])
+
+    def summary(self):
+        with self.lock:
+            summary = dict(self.counters)
+
+            for name, histogram in self.histograms.items():
+                summary[name] = histogram.summary()
+
+            return summary
+
+    def reset(self):
+        with self.lock:
+            for name in self.counters:
+                self.counters[name] = 0
+
+            for name, histogram in self.histograms.items():
+                self.histograms[name] = PDKHistogram(histogram.buckets, histogram.samples.maxlen)
+
+    def openmetrics(self, prefix='pdk_client'):
+        # OpenMetrics text exposition, also accepted by Prometheus scrapers.
+
+        lines = []
+
+        with self.lock:
+            for name, value in self.counters.items():
+                lines.append('# TYPE %s_%s counter' % (prefix, name)) # pylint: disable=consider-using-f-string
+                lines.append('%s_%s_total %s' % (prefix, name, value)) # pylint: disable=consider-using-f-string
+
+            for name, histogram in self.histograms.items():
+                metric = prefix + '_' + name
+
+                lines.append('# TYPE %s histogram' % metric) # pylint: disable=consider-using-f-string
+
+                cumulative = 0
+
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+
+                    lines.append('%s_bucket{le="%s"} %d' % (metric, repr(float(bound)), cumulative)) # pylint: disable=consider-using-f-string
+
+                lines.append('%s_bucket{le="+Inf"} %d' % (metric, histogram.count)) # pylint: disable=consider-using-f-string
+                lines.append('%s_sum %s' % (metric, repr(histogram.total))) # pylint: disable=consider-using-f-string
+                lines.append('%s_count %d' % (metric, histogram.count)) # pylint: disable=consider-using-f-string
+
+        lines.append('# EOF')
+
+        return '\n'.join(lines) + '\n'
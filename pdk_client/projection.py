@@ -0,0 +1,43 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Client-side field projection for only() and values_list(). Fields are dotted
+# paths into a data point, such as "created" or "properties.level".
+
+from .rows import PDKDataPoint
+
+MAPPING_TYPES = (dict, PDKDataPoint)
+
+def field_value(point, field):
+    value = point
+
+    for part in field.split('.'):
+        if isinstance(value, MAPPING_TYPES) is False or part not in value:
+            return None
+
+        value = value[part]
+
+    return value
+
+def project_point(point, fields):
+    projected = {}
+
+    for field in fields:
+        parts = field.split('.')
+
+        source = point
+
+        for part in parts[:-1]:
+            source = source.get(part, None) if isinstance(source, MAPPING_TYPES) else None
+
+        if isinstance(source, MAPPING_TYPES) is False or parts[-1] not in source:
+            continue
+
+        target = projected
+
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+
+        target[parts[-1]] = source[parts[-1]]
+
+    return projected
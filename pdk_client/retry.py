@@ -0,0 +1,111 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Retry policy shared by every request issued through a PDKTransport. Delays
+# use decorrelated jitter so that workers do not retry in lockstep, honor the
+# server's Retry-After header, and non-retryable responses fail immediately.
+# An optional retry budget and circuit breaker are shared by all queries of a
+# client, so a struggling server is not hammered by every worker at once.
+
+from builtins import object # pylint: disable=redefined-builtin
+
+import email.utils
+import random
+import threading
+import time
+
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+class PDKClientCircuitOpen(Exception):
+    pass
+
+class PDKRetryPolicy(object): # pylint: disable=useless-object-inheritance, too-many-instance-attributes
+    def __init__(self, base_delay=3.75, max_delay=240, max_retry_duration=480, retryable_status_codes=RETRYABLE_STATUS_CODES, budget_ratio=None, budget_capacity=10, failure_threshold=None, reset_timeout=30): # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_duration = max_retry_duration
+        self.retryable_status_codes = retryable_status_codes
+
+        # Retry budget: every request earns `budget_ratio` retries, up to
+        # `budget_capacity` banked retries. None disables the budget.
+        self.budget_ratio = budget_ratio
+        self.budget_capacity = budget_capacity
+        self.budget = float(budget_capacity)
+
+        # Circuit breaker: opens after `failure_threshold` consecutive failures
+        # and fails requests fast for `reset_timeout` seconds. None disables it.
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.open_until = None
+
+        self.lock = threading.Lock()
+
+    def is_retryable_status(self, status_code):
+        return status_code in self.retryable_status_codes
+
+    def before_request(self):
+        with self.lock:
+            if self.budget_ratio is not None:
+                self.budget = min(float(self.budget_capacity), self.budget + self.budget_ratio)
+
+            if self.open_until is not None and time.time() < self.open_until:
+                raise PDKClientCircuitOpen('Circuit open after %d consecutive failures; retry in %.1f seconds' % (self.consecutive_failures, self.open_until - time.time())) # pylint: disable=consider-using-f-string
+
+    def record_success(self):
+        with self.lock:
+            self.consecutive_failures = 0
+            self.open_until = None
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+
+            if self.failure_threshold is not None and self.consecutive_failures >= self.failure_threshold:
+                self.open_until = time.time() + self.reset_timeout
+
+    def retry_after(self, response): # pylint: disable=no-self-use
+        if response is None:
+            return None
+
+        value = response.headers.get('Retry-After', None)
+
+        if value is None:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        parsed = email.utils.parsedate_tz(value)
+
+        if parsed is None:
+            return None
+
+        return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+    def next_delay(self, previous_delay, elapsed, retry_after=None):
+        # Returns the number of seconds to wait before the next attempt, or None
+        # to give up (retry duration or budget exhausted, or circuit open).
+
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            # The first delay is drawn too, so workers failing together do not all retry together.
+            delay = min(self.max_delay, random.uniform(self.base_delay, (previous_delay or self.base_delay) * 3)) # nosec
+
+        if elapsed + delay > self.max_retry_duration:
+            return None
+
+        with self.lock:
+            if self.open_until is not None and time.time() + delay < self.open_until:
+                return None
+
+            if self.budget_ratio is not None:
+                if self.budget < 1:
+                    return None
+
+                self.budget -= 1
+
+        return delay
@@ -0,0 +1,108 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Compact, read-only row type for data point query results (opt in with
+# query.as_rows()). The fields most code reads - pk, source,
+# generator_identifier, created and recorded - live in __slots__ instead of a
+# per-point dict, and the highly repetitive source and generator identifiers
+# are interned so that every row shares one copy. Derived values are only
+# computed when first used, then cached: created_at / recorded_at are parsed
+# with arrow, and properties sent by the server as JSON text are decoded on
+# first access. Rows remain read-only mappings, so point['properties']['level']
+# keeps working.
+
+from builtins import str # pylint: disable=redefined-builtin
+
+import json
+
+try:
+    from sys import intern
+except ImportError: # Python 2: intern() is a builtin.
+    pass
+
+try:
+    from collections.abc import Mapping
+except ImportError: # Python 2
+    from collections import Mapping # pylint: disable=deprecated-class, no-name-in-module
+
+import arrow
+
+EAGER_FIELDS = ('pk', 'source', 'generator_identifier', 'created', 'recorded')
+
+ROW_FIELDS = EAGER_FIELDS + ('properties',)
+
+class PDKDataPoint(Mapping): # pylint: disable=too-many-instance-attributes
+    __slots__ = ('pk', 'source', 'generator_identifier', 'created', 'recorded', 'raw_properties', 'properties_decoded', 'created_datetime', 'recorded_datetime', 'extra')
+
+    def __init__(self, point): # pylint: disable=super-init-not-called
+        self.pk = point.get('pk', None) # pylint: disable=invalid-name
+        self.source = point.get('source', None)
+        self.generator_identifier = point.get('generator_identifier', None)
+
+        if isinstance(self.source, str):
+            self.source = intern(self.source)
+
+        if isinstance(self.generator_identifier, str):
+            self.generator_identifier = intern(self.generator_identifier)
+
+        self.created = point.get('created', None)
+        self.recorded = point.get('recorded', None)
+
+        self.raw_properties = point.get('properties', None)
+        self.properties_decoded = isinstance(self.raw_properties, str) is False
+
+        self.created_datetime = None
+        self.recorded_datetime = None
+
+        self.extra = dict((key, value) for key, value in point.items() if key not in ROW_FIELDS) or None
+
+    @property
+    def properties(self):
+        if self.properties_decoded is False:
+            self.raw_properties = json.loads(self.raw_properties)
+            self.properties_decoded = True
+
+        return self.raw_properties
+
+    @property
+    def created_at(self):
+        if self.created_datetime is None and self.created is not None:
+            self.created_datetime = arrow.get(self.created).datetime
+
+        return self.created_datetime
+
+    @property
+    def recorded_at(self):
+        if self.recorded_datetime is None and self.recorded is not None:
+            self.recorded_datetime = arrow.get(self.recorded).datetime
+
+        return self.recorded_datetime
+
+    def __getitem__(self, key):
+        if key in EAGER_FIELDS:
+            return getattr(self, key)
+
+        if key == 'properties':
+            return self.properties
+
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key in ROW_FIELDS: # pylint: disable=use-yield-from
+            yield key
+
+        if self.extra is not None:
+            for key in self.extra: # pylint: disable=use-yield-from
+                yield key
+
+    def __len__(self):
+        return len(ROW_FIELDS) + (len(self.extra) if self.extra is not None else 0)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return 'PDKDataPoint(%r)' % self.to_dict() # pylint: disable=consider-using-f-string
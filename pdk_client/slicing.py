@@ -0,0 +1,88 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+from builtins import range # pylint: disable=redefined-builtin
+
+from concurrent import futures
+
+class PDKQuerySlice(object): # pylint: disable=useless-object-inheritance
+    # Lazy, list-like view over a slice of a query. Only the pages covering the
+    # requested indices are fetched, several at a time when the range spans
+    # more than one page.
+
+    def __init__(self, query, slice_item, workers=4):
+        self.query = query
+        self.workers = workers
+
+        self.indices = range(*slice_item.indices(query.count()))
+
+        self.pages = {}
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __repr__(self):
+        return '<PDKQuerySlice %s of %s>' % (self.indices, self.query.__class__.__name__) # pylint: disable=consider-using-f-string
+
+    def page_numbers(self, indices):
+        page_numbers = []
+
+        for index in indices:
+            page_number = index // self.query.page_size
+
+            if not page_numbers or page_numbers[-1] != page_number:
+                page_numbers.append(page_number)
+
+        return page_numbers
+
+    def load_pages(self, page_numbers):
+        missing = [page_number for page_number in page_numbers if page_number not in self.pages]
+
+        if len(missing) == 1 or self.workers <= 1:
+            for page_number in missing:
+                self.pages[page_number] = self.query.fetch_page(page_number)['matches']
+        elif missing:
+            executor = futures.ThreadPoolExecutor(max_workers=min(self.workers, len(missing)))
+
+            try:
+                for page_number, response_payload in zip(missing, executor.map(self.query.fetch_page, missing)):
+                    self.pages[page_number] = response_payload['matches']
+            finally:
+                executor.shutdown(wait=False)
+
+    def item(self, index):
+        page = self.pages[index // self.query.page_size]
+
+        return page[index % self.query.page_size]
+
+    def __getitem__(self, slice_item):
+        if isinstance(slice_item, slice):
+            view = PDKQuerySlice(self.query, slice(0, 0), workers=self.workers)
+            view.indices = self.indices[slice_item]
+            view.pages = self.pages
+
+            return view
+
+        index = self.indices[slice_item]
+
+        self.load_pages([index // self.query.page_size])
+
+        return self.item(index)
+
+    def __iter__(self):
+        page_numbers = self.page_numbers(self.indices)
+        position = 0
+
+        for index in self.indices:
+            page_number = index // self.query.page_size
+
+            if page_number not in self.pages:
+                # Keep at most one window of pages in memory while iterating.
+                self.pages.clear()
+
+                while page_numbers[position] != page_number:
+                    position += 1
+
+                self.load_pages(page_numbers[position:position + max(1, self.workers)])
+
+            yield self.item(index)
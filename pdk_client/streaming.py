@@ -0,0 +1,207 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+import codecs
+import json
+import re
+
+STRING_SPECIAL = re.compile(r'["\\]')
+CONTAINER_SPECIAL = re.compile(r'["\[\]{}]')
+SCALAR_END = re.compile(r'[\s,:\]}]')
+
+def stream_matches(response, metadata, chunk_size=65536): # pylint: disable=too-many-statements
+    # Incrementally decodes a page response of the form {"count": ..., "matches": [...], ...},
+    # yielding each element of "matches" as soon as it has been read. The other top-level
+    # values are stored in `metadata`. Only the item being decoded is held in memory.
+    #
+    # When a value is not yet complete in the buffer, its end is located by scanning only
+    # newly received text before decoding it once, so items larger than `chunk_size`
+    # still take linear time.
+
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+
+    chunks = response.iter_content(chunk_size=chunk_size)
+
+    state = {
+        'buffer': '',
+        'position': 0,
+        'finished': False,
+    }
+
+    def fill(minimum=1):
+        # Appends at least `minimum` characters (or the rest of the response) to the
+        # unread part of the buffer. Growing by the unread length keeps copying linear.
+
+        parts = [state['buffer'][state['position']:]]
+        added = 0
+
+        while added < minimum and state['finished'] is False:
+            try:
+                text = text_decoder.decode(next(chunks))
+            except StopIteration:
+                text = text_decoder.decode(b'', final=True)
+
+                state['finished'] = True
+
+            parts.append(text)
+            added += len(text)
+
+        state['buffer'] = ''.join(parts)
+        state['position'] = 0
+
+    def next_token():
+        while True:
+            buffer = state['buffer']
+            position = state['position']
+
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+
+            state['position'] = position
+
+            if position < len(buffer):
+                return buffer[position]
+
+            if state['finished']:
+                raise ValueError('Unexpected end of page response')
+
+            fill()
+
+    def value_end(progress): # pylint: disable=too-many-branches
+        # Returns the end of the value starting at state['position'] once the buffer
+        # holds all of it. Otherwise records how far it got (relative to the value
+        # start, which survives fill()) and returns None.
+
+        buffer = state['buffer']
+        index = state['position'] + progress['offset']
+
+        while True:
+            if progress['scalar']:
+                # Numbers and literals end at the next delimiter, never at the buffer end,
+                # so "1.5e10" split after "1." or "1.5e" is not decoded early.
+                match = SCALAR_END.search(buffer, index)
+
+                if match is not None:
+                    return match.start()
+
+                index = len(buffer)
+
+                break
+
+            if progress['string']:
+                match = STRING_SPECIAL.search(buffer, index)
+
+                if match is None:
+                    index = len(buffer)
+
+                    break
+
+                index = match.start()
+
+                if buffer[index] == '\\':
+                    if index + 1 >= len(buffer):
+                        break # Resume at the backslash once the escaped character arrives.
+
+                    index += 2
+
+                    continue
+
+                index += 1
+
+                progress['string'] = False
+
+                if progress['depth'] == 0:
+                    return index
+            else:
+                match = CONTAINER_SPECIAL.search(buffer, index)
+
+                if match is None:
+                    index = len(buffer)
+
+                    break
+
+                index = match.end()
+
+                character = match.group(0)
+
+                if character == '"':
+                    progress['string'] = True
+                elif character in '{[':
+                    progress['depth'] += 1
+                else:
+                    progress['depth'] -= 1
+
+                    if progress['depth'] == 0:
+                        return index
+
+        progress['offset'] = index - state['position']
+
+        return None
+
+    def next_value():
+        first = next_token()
+
+        # Fast path: most values are already complete in the buffer.
+        try:
+            value, end = decoder.raw_decode(state['buffer'], state['position'])
+
+            if first in '{["' or (end < len(state['buffer']) and SCALAR_END.match(state['buffer'], end) is not None):
+                state['position'] = end
+
+                return value
+        except ValueError:
+            pass
+
+        progress = {
+            'offset': 1,
+            'depth': 1 if first in '{[' else 0,
+            'string': first == '"',
+            'scalar': first not in '{["',
+        }
+
+        while True:
+            end = value_end(progress)
+
+            if end is not None or state['finished']:
+                break
+
+            fill(len(state['buffer']) - state['position'])
+
+        value, decoded_end = decoder.raw_decode(state['buffer'], state['position'])
+
+        if end is not None and decoded_end != end:
+            raise ValueError('Unexpected content in page response at "%s"' % state['buffer'][decoded_end:decoded_end + 20]) # pylint: disable=consider-using-f-string
+
+        state['position'] = decoded_end
+
+        return value
+
+    def expect(token):
+        if next_token() != token:
+            raise ValueError('Expected "%s" in page response' % token) # pylint: disable=consider-using-f-string
+
+        state['position'] += 1
+
+    expect('{')
+
+    while next_token() != '}':
+        key = next_value()
+
+        expect(':')
+
+        if key == 'matches':
+            expect('[')
+
+            while next_token() != ']':
+                yield next_value()
+
+                if next_token() == ',':
+                    state['position'] += 1
+
+            state['position'] += 1
+        else:
+            metadata[key] = next_value()
+
+        if next_token() == ',':
+            state['position'] += 1
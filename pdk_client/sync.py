@@ -0,0 +1,59 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Incremental sync: yields the points of a query recorded since the previous
+# run with the same state file. A point counts as processed once the next one
+# is requested. The (recorded, pk) watermark of the last processed point is
+# saved after every page and when iteration stops early (an exception, a break
+# or a server error), so the next run resumes with the first unprocessed
+# point. After a hard kill, the unfinished page is delivered again.
+
+from builtins import str, object # pylint: disable=redefined-builtin
+
+import io
+import json
+import os
+
+import arrow
+
+class PDKSync(object): # pylint: disable=useless-object-inheritance, too-few-public-methods
+    def __init__(self, query, state_path):
+        self.query = query
+        self.state_path = state_path
+
+        self.saved = None
+
+        if os.path.exists(state_path):
+            with io.open(state_path, encoding='utf-8') as state_file:
+                watermark = json.load(state_file).get('watermark', None)
+
+            if watermark is not None:
+                self.saved = tuple(watermark)
+
+        self.processed = self.saved
+
+    def save(self, watermark):
+        if watermark is None or tuple(watermark) == self.saved:
+            return
+
+        self.saved = tuple(watermark)
+
+        temp_path = self.state_path + '.tmp'
+
+        with io.open(temp_path, 'w', encoding='utf-8') as state_file:
+            state_file.write(str(json.dumps({
+                'watermark': list(watermark),
+                'updated': arrow.utcnow().isoformat(),
+            })))
+
+        # os.replace is atomic; Python 2 only has os.rename (atomic on POSIX).
+        getattr(os, 'replace', os.rename)(temp_path, self.state_path)
+
+    def __iter__(self):
+        try:
+            for point in self.query.iterate_keyset(key='recorded', tie_breaker='pk', after=self.processed, on_page=self.save):
+                yield point
+
+                self.processed = (point['recorded'], point['pk'])
+        finally:
+            self.save(self.processed)
@@ -0,0 +1,90 @@
+# pylint: disable=line-too-long
+# -*- coding: utf-8 -*-
+
+# Token lifecycle shared by every request issued through a PDKTransport.
+# Requests always carry the current token rather than the one copied into a
+# query when it was created. When the client holds credentials, the token is
+# renewed `refresh_ahead` seconds before it expires, and once more if the
+# server rejects it (401 / 403), after which the request is sent again - so a
+# long iteration continues with its current page instead of starting over.
+# Renewal is single-flight: concurrent requests holding the same stale token
+# wait for one renewal instead of each requesting a token of their own.
+
+from builtins import object # pylint: disable=redefined-builtin
+
+import datetime
+import logging
+import threading
+
+import arrow
+import requests
+
+AUTH_FAILURE_STATUS_CODES = (401, 403)
+
+class PDKTokenManager(object): # pylint: disable=useless-object-inheritance
+    def __init__(self, token=None, expires=None, renew=None, refresh_ahead=60):
+        self.token = token
+        self.expires = expires
+
+        # Callable returning a new (token, expires) pair, or None when the token cannot be renewed.
+        self.renew = renew
+
+        self.refresh_ahead = refresh_ahead
+
+        self.lock = threading.Lock()
+
+    def expiring(self):
+        if self.expires is None or self.refresh_ahead is None:
+            return False
+
+        return arrow.utcnow().datetime >= self.expires - datetime.timedelta(seconds=self.refresh_ahead)
+
+    def expired(self):
+        if self.expires is None:
+            return False
+
+        return arrow.utcnow().datetime > self.expires
+
+    def current(self):
+        token = self.token
+
+        if self.renew is not None and self.expiring():
+            try:
+                return self.refresh(token)
+            except Exception as error: # pylint: disable=broad-exception-caught
+                if self.expired():
+                    raise
+
+                logging.warning('Unable to renew token ahead of expiry (%s); using the current token.', str(error))
+
+        return token
+
+    def refresh(self, stale_token=None):
+        # Renews the token unless another thread already replaced `stale_token`.
+
+        with self.lock:
+            if stale_token is not None and self.token != stale_token:
+                return self.token
+
+            if self.renew is None:
+                return None
+
+            self.token, self.expires = self.renew()
+
+            return self.token
+
+    def send(self, send, payload):
+        payload = dict(payload)
+        payload['token'] = self.current()
+
+        try:
+            return send(payload)
+        except requests.exceptions.HTTPError as error:
+            if self.renew is None or error.response is None or error.response.status_code not in AUTH_FAILURE_STATUS_CODES:
+                raise
+
+            logging.warning('Token rejected (HTTP %s); renewing and sending again...', error.response.status_code)
+
+            payload['token'] = self.refresh(payload['token'])
+
+            return send(payload)
@@ -5,4 +5,35 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# import sample
+import unittest
+
+import pdk_client
+
+from benchmarks.stub_server import StubServer, STUB_TOKEN
+
+from pdk_client import PDKClient
+
+# Credentials accepted by the local stub server.
+STUB_USERNAME = 'user'
+STUB_PASSWORD = 'password' # nosec B105
+
+
+class StubServerTestCase(unittest.TestCase):
+    """Runs each test against its own local stub server, StubServer(**stub_options)."""
+
+    stub_options = dict()
+
+    def setUp(self):
+        self.server = StubServer(**self.stub_options).start()
+        self.client = self.stub_client()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def stub_client(self, **kwargs):
+        # Uses the stub token unless username and password are given.
+        if 'username' not in kwargs:
+            kwargs.setdefault('token', STUB_TOKEN)
+
+        return PDKClient(site_url=self.server.url, **kwargs)
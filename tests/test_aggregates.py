@@ -0,0 +1,79 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import datetime
+import unittest
+
+from pdk_client import Count, Min, Max, Sum, Avg
+from pdk_client.aggregates import Aggregate
+
+
+class AggregateTestSuite(StubServerTestCase):
+    """aggregate(), values().annotate() and histogram() against a local stub server."""
+
+    stub_options = dict(size=250, sources=5)
+
+    def setUp(self):
+        super().setUp()
+
+        self.points = self.server.state.points
+
+    def query(self):
+        return self.client.query_data_points(page_size=40)
+
+    def test_aggregate(self):
+        levels = [point['properties']['level'] for point in self.points]
+
+        for query in (self.query(), self.query().order_by('-source')):
+            results = query.aggregate(Count(), Min('created'), Max('created'), Sum('properties.level'), level=Avg('properties.level'))
+
+            self.assertEqual(results['count'], 250)
+            self.assertEqual(results['created__min'], self.points[0]['created'])
+            self.assertEqual(results['created__max'], self.points[-1]['created'])
+            self.assertEqual(results['properties__level__sum'], sum(levels))
+            self.assertAlmostEqual(results['level'], float(sum(levels)) / len(levels))
+
+    def test_base_aggregate_counts(self):
+        self.points[0]['properties']['level'] = None
+
+        results = self.query().aggregate(Aggregate(), Aggregate('properties.level'))
+
+        self.assertEqual(results, {'count': 250, 'properties__level__count': 249})
+
+    def test_annotate(self):
+        rows = self.query().values('source').annotate(Count(), Max('properties.level'))
+
+        expected = {}
+
+        for point in self.points:
+            count, level = expected.get(point['source'], (0, None))
+
+            expected[point['source']] = (count + 1, max(level, point['properties']['level']) if level is not None else point['properties']['level'])
+
+        self.assertEqual(dict((row['source'], (row['count'], row['properties__level__max'])) for row in rows), expected)
+
+    def test_annotate_unhashable_values(self):
+        for point in self.points:
+            point['properties']['tags'] = ['even'] if point['pk'] % 2 == 0 else ['odd', {'rank': point['pk'] % 4}]
+
+        rows = self.query().values('properties.tags').annotate(Count())
+
+        self.assertEqual(sorted(([row['properties.tags'], row['count']] for row in rows), key=lambda row: -row[1]), [
+            [['even'], 125],
+            [['odd', {'rank': 1}], 63],
+            [['odd', {'rank': 3}], 62],
+        ])
+
+    def test_histogram(self):
+        histogram = self.query().histogram(interval=datetime.timedelta(minutes=1))
+
+        self.assertEqual([count for bucket, count in histogram], [60, 60, 60, 60, 10])
+        self.assertEqual(histogram[0][0].isoformat(), self.points[0]['created'])
+
+        self.assertEqual(self.query().filter(source='missing').histogram(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
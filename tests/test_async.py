@@ -0,0 +1,64 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase, STUB_TOKEN, STUB_USERNAME, STUB_PASSWORD
+
+import asyncio
+import unittest
+
+try:
+    from pdk_client import AsyncPDKClient
+    from pdk_client.async_client import httpx
+except ImportError:
+    httpx = None
+
+
+@unittest.skipIf(httpx is None, 'AsyncPDKClient requires httpx')
+class AsyncClientTestSuite(StubServerTestCase):
+    """AsyncPDKClient cases against a local stub server."""
+
+    stub_options = dict(size=60, latency=0.01)
+
+    def test_query_pages(self):
+        async def run():
+            async with AsyncPDKClient(site_url=self.server.url, username=STUB_USERNAME, password=STUB_PASSWORD) as client:
+                query = client.query_data_points(page_size=25)
+
+                points = [point async for point in query]
+
+                return points, await query.count(), await query.first(), await query.last()
+
+        points, count, first, last = asyncio.run(run())
+
+        self.assertEqual([point['pk'] for point in points], list(range(1, 61)))
+        self.assertEqual(count, 60)
+        self.assertEqual(first['pk'], 1)
+        self.assertEqual(last['pk'], 60)
+
+    def test_concurrency_limit_outside_loop(self):
+        # Built before any loop runs; requests must still queue for a slot.
+        client = AsyncPDKClient(site_url=self.server.url, token=STUB_TOKEN, concurrency=2)
+
+        query = client.query_data_points(page_size=5)
+
+        async def run():
+            try:
+                return await asyncio.gather(*[query.fetch_page(page_number) for page_number in range(12)])
+            finally:
+                await client.close()
+
+        pages = asyncio.run(run())
+
+        self.assertEqual([page['matches'][0]['pk'] for page in pages], list(range(1, 61, 5)))
+
+    def test_update(self):
+        async def run():
+            async with AsyncPDKClient(site_url=self.server.url, token=STUB_TOKEN) as client:
+                return await client.update_data_sources().filter(identifier='source-3').update(name='Renamed')
+
+        self.assertEqual(asyncio.run(run()), 1)
+        self.assertEqual(self.server.state.sources[3]['name'], 'Renamed')
+
+
+if __name__ == '__main__':
+    unittest.main()
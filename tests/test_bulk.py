@@ -0,0 +1,97 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import unittest
+
+import requests
+
+from pdk_client import PDKRetryPolicy, PDKClientCircuitOpen
+from pdk_client.bulk import update_chunks
+
+
+class BulkUpdateTestSuite(StubServerTestCase):
+    """bulk_update_data_sources() cases against a local stub server."""
+
+    stub_options = dict(size=10, sources=25)
+
+    def changes(self):
+        changes = {}
+
+        for index in range(25):
+            changes['source-%d' % index] = {'name': 'Group A' if index < 10 else 'Group B'}
+
+        return changes
+
+    def update_requests(self):
+        return [params for path, params in self.server.state.requests if path.endswith('/api/data-sources/update.json')]
+
+    def retry_client(self, **kwargs):
+        kwargs.setdefault('base_delay', 0.01)
+        kwargs.setdefault('max_delay', 0.05)
+
+        return self.stub_client(retry_policy=PDKRetryPolicy(**kwargs))
+
+    def test_chunks_group_identical_updates(self):
+        chunks = update_chunks(self.changes(), chunk_size=4)
+
+        self.assertEqual([len(filters['identifier__in']) for filters, fields in chunks], [4, 4, 2, 4, 4, 4, 3])
+        self.assertEqual([fields['name'] for filters, fields in chunks], ['Group A'] * 3 + ['Group B'] * 4)
+
+        pairs = [({'identifier': 'source-1'}, {'name': 'One'}), ({'identifier__startswith': 'source-2'}, {'name': 'Two'})]
+
+        self.assertEqual(update_chunks(pairs, chunk_size=1), pairs)
+
+    def test_reports_updated_per_chunk(self):
+        results = self.client.bulk_update_data_sources(self.changes(), chunk_size=4, workers=3)
+
+        self.assertEqual([result['updated'] for result in results], [4, 4, 2, 4, 4, 4, 3])
+        self.assertTrue(all(result['error'] is None for result in results))
+        self.assertEqual(len(self.update_requests()), 7)
+
+        names = dict((source['identifier'], source['name']) for source in self.server.state.sources)
+
+        self.assertEqual(names['source-9'], 'Group A')
+        self.assertEqual(names['source-10'], 'Group B')
+
+    def test_failed_chunk_is_reported(self):
+        self.server.state.faults.append(400)
+
+        results = self.client.bulk_update_data_sources(self.changes(), chunk_size=10, workers=1)
+
+        self.assertIsInstance(results[0]['error'], requests.exceptions.HTTPError)
+        self.assertEqual(results[0]['updated'], 0)
+        self.assertEqual([result['updated'] for result in results[1:]], [10, 5])
+        self.assertEqual(len(self.update_requests()), 3)
+
+    def test_retryable_failure_is_sent_again_once_by_the_transport(self):
+        self.server.state.faults.extend([503, 503])
+
+        results = self.retry_client().bulk_update_data_sources(self.changes(), chunk_size=10, workers=1)
+
+        self.assertEqual([result['updated'] for result in results], [10, 10, 5])
+        self.assertEqual(len(self.update_requests()), 5)
+
+        # A chunk that keeps failing is retried for max_retry_duration in total, not once per attempt.
+        self.server.state.faults.extend([503] * 100)
+
+        results = self.retry_client(max_retry_duration=0.2).bulk_update_data_sources({'source-1': {'name': 'One'}})
+
+        self.assertIsInstance(results[0]['error'], pdk_client.client.PDKClientServerError)
+        self.assertTrue(len(self.update_requests()) - 5 < 20)
+
+    def test_open_circuit_is_reported_per_chunk(self):
+        self.server.state.faults.extend([503] * 10)
+
+        client = self.retry_client(failure_threshold=1, reset_timeout=60)
+
+        results = client.bulk_update_data_sources(self.changes(), chunk_size=10, workers=1)
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result['updated'] == 0 for result in results))
+        self.assertTrue(all(isinstance(result['error'], PDKClientCircuitOpen) for result in results[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
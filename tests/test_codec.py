@@ -0,0 +1,128 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, STUB_TOKEN
+
+import datetime
+import decimal
+import json
+import unittest
+import uuid
+
+from pdk_client.client import PDKDataPointQuery
+from pdk_client.codec import DatetimeEncoder, JSON_CODECS, json_codec, serialized_query, PDKJSONCodec
+
+
+def installed_codecs():
+    codecs = []
+
+    for name in JSON_CODECS:
+        try:
+            codecs.append(json_codec(name))
+        except ImportError:
+            pass
+
+    return codecs
+
+
+class BaselineEncoder(json.JSONEncoder):
+    # The encoder filters were sent with before codecs were pluggable: datetimes
+    # as isoformat(), everything else through str().
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+
+        return str(o)
+
+
+FILTERS = [{
+    'created__gte': datetime.datetime(2020, 1, 1, 12, 30, 15, 250, tzinfo=datetime.timezone.utc),
+    'recorded__lte': datetime.datetime(2020, 1, 2),
+    'day': datetime.date(2020, 1, 3),
+    'time': datetime.time(8, 15),
+    'level__gt': decimal.Decimal('50.25'),
+    'source__in': [uuid.UUID('12345678-1234-5678-1234-567812345678'), 'café'],
+    'properties__passive-data-metadata__timestamp__gte': 1577836800.5,
+    'flag': True,
+    'missing': None,
+}]
+
+
+class CodecTestSuite(unittest.TestCase):
+    """JSON codec selection, encoding and serialized query payloads."""
+
+    def test_codec_selection(self):
+        self.assertEqual(json_codec('json').name, 'json')
+        self.assertEqual(json_codec(None).name, installed_codecs()[0].name)
+
+        codec = PDKJSONCodec()
+
+        self.assertIs(json_codec(codec), codec)
+
+        with self.assertRaises(ValueError):
+            json_codec('simplejson')
+
+        try:
+            import orjson
+        except ImportError:
+            with self.assertRaises(ImportError):
+                json_codec('orjson')
+        else:
+            self.assertEqual(json_codec('orjson').name, 'orjson')
+            self.assertEqual(json_codec(None).name, 'orjson')
+
+    def test_encoder_types(self):
+        encoded = json.loads(json.dumps(FILTERS, cls=DatetimeEncoder))[0]
+
+        self.assertEqual(encoded['created__gte'], '2020-01-01T12:30:15.000250+00:00')
+        self.assertEqual(encoded['day'], '2020-01-03')
+        self.assertEqual(encoded['time'], '08:15:00')
+        self.assertEqual(encoded['level__gt'], '50.25')
+        self.assertEqual(encoded['source__in'], ['12345678-1234-5678-1234-567812345678', 'café'])
+
+    def test_wire_format_unchanged(self):
+        expected = json.dumps(FILTERS, cls=BaselineEncoder)
+
+        for codec in installed_codecs():
+            self.assertEqual(codec.dumps(FILTERS), expected, codec.name)
+
+    def test_codecs_decode_alike(self):
+        page = json.dumps({'count': 2, 'matches': [{'pk': 1, 'properties': {'level': 50.5, 'name': 'café'}}, {'pk': 2, 'properties': None}]})
+
+        for codec in installed_codecs():
+            self.assertEqual(codec.loads(page.encode('utf-8')), json.loads(page), codec.name)
+            self.assertEqual(codec.loads(page), json.loads(page), codec.name)
+
+    def test_serialized_query_invalidation(self):
+        codec = json_codec('json')
+
+        query = PDKDataPointQuery(STUB_TOKEN, 'http://localhost', None).filter(source='source-1')
+
+        payload = serialized_query(query, codec)
+
+        self.assertIs(serialized_query(query, codec), payload)
+        self.assertEqual(json.loads(payload['filters']), [{'source': 'source-1'}])
+        self.assertNotIn('fields', payload)
+
+        filtered = query.filter(generator_identifier='pdk-device-battery')
+
+        self.assertEqual(json.loads(serialized_query(filtered, codec)['filters']), [{'source': 'source-1'}, {'generator_identifier': 'pdk-device-battery'}])
+        self.assertEqual(json.loads(serialized_query(query, codec)['filters']), [{'source': 'source-1'}])
+
+        projected = query.only('pk', 'created')
+
+        self.assertEqual(json.loads(serialized_query(projected, codec)['fields']), ['pk', 'created'])
+
+        ordered = query.order_by('-created')
+
+        self.assertEqual(json.loads(serialized_query(ordered, codec)['order_by']), [['-created']])
+
+        # Lists changed in place are noticed too.
+        query.excludes.append({'source': 'source-2'})
+
+        self.assertEqual(json.loads(serialized_query(query, codec)['excludes']), [{'source': 'source-2'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
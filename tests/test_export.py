@@ -0,0 +1,164 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class ExportTestSuite(StubServerTestCase):
+    """query.export() cases against a local stub server."""
+
+    stub_options = dict(size=250)
+
+    def setUp(self):
+        super().setUp()
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super().tearDown()
+
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def read_jsonl(self, path):
+        with io.open(path, encoding='utf-8') as export_file:
+            return [json.loads(line) for line in export_file]
+
+    def page_indices(self):
+        return [params['page_index'] for path, params in self.server.state.requests if path.endswith('/api/data-points.json')]
+
+    def add_late_field(self):
+        for point in self.server.state.points[100:200]:
+            point['properties']['extra_field'] = point['pk']
+
+    def test_jsonl_keeps_fields_after_first_page(self):
+        self.add_late_field()
+
+        query = self.client.query_data_points(page_size=50)
+
+        self.assertEqual(query.export(self.path('points.jsonl')), 250)
+
+        rows = self.read_jsonl(self.path('points.jsonl'))
+
+        self.assertEqual(len([row for row in rows if 'properties.extra_field' in row]), 100)
+
+        query.export(self.path('projected.jsonl'), columns=['pk', 'properties.extra_field'])
+
+        rows = self.read_jsonl(self.path('projected.jsonl'))
+
+        self.assertEqual(set(rows[0].keys()), set(['pk', 'properties.extra_field']))
+        self.assertEqual(rows[150]['properties.extra_field'], 151)
+
+    def test_csv_rejects_fields_after_first_page(self):
+        self.add_late_field()
+
+        query = self.client.query_data_points(page_size=50)
+
+        with self.assertRaises(ValueError):
+            query.export(self.path('points.csv'), format='csv', batch_pages=1)
+
+        query.export(self.path('points.csv'), format='csv', columns=['pk', 'properties.extra_field'])
+
+        with io.open(self.path('points.csv'), encoding='utf-8', newline='') as export_file:
+            rows = list(csv.DictReader(export_file))
+
+        self.assertEqual(len(rows), 250)
+        self.assertEqual(len([row for row in rows if row['properties.extra_field']]), 100)
+
+    def test_parquet_rejects_values_outside_the_column_type(self):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+
+        points = self.server.state.points
+
+        # Integers after floats fit the float column of the first batch.
+        points[0]['properties']['level'] = 0.5
+
+        query = self.client.query_data_points(page_size=50).only('pk', 'properties.level')
+
+        query.export(self.path('widened'), format='parquet', batch_pages=1)
+
+        levels = pyarrow.parquet.read_table(self.path('widened')).column('properties.level').to_pylist()
+
+        self.assertEqual(levels[:3], [0.5, 1.0, 2.0])
+
+        # A float after integers would be truncated by the int64 column.
+        points[0]['properties']['level'] = 0
+        points[150]['properties']['level'] = 50.5
+
+        with self.assertRaises(ValueError):
+            query.export(self.path('truncated'), format='parquet', batch_pages=1)
+
+    def test_resumes_interrupted_export(self):
+        query = self.client.query_data_points(page_size=50)
+
+        fetch_page = query.fetch_page
+
+        def interrupted(page_number, page_size=None):
+            if page_number == 3:
+                raise KeyboardInterrupt()
+
+            return fetch_page(page_number, page_size)
+
+        query.fetch_page = interrupted
+
+        with self.assertRaises(KeyboardInterrupt):
+            query.export(self.path('points.csv'), format='csv', batch_pages=1)
+
+        self.assertTrue(os.path.exists(self.path('points.csv.progress.json')))
+
+        del self.server.state.requests[:]
+
+        # The same query (same snapshot) resumes with page 3.
+        repeated = self.client.query_data_points(page_size=50, snapshot=query.filters[0]['recorded__lte'])
+
+        self.assertEqual(repeated.export(self.path('points.csv'), format='csv', batch_pages=1), 100)
+        self.assertEqual(self.page_indices(), ['0', '3', '4'])
+        self.assertFalse(os.path.exists(self.path('points.csv.progress.json')))
+
+        with io.open(self.path('points.csv'), encoding='utf-8', newline='') as export_file:
+            rows = list(csv.DictReader(export_file))
+
+        self.assertEqual([int(row['pk']) for row in rows], list(range(1, 251)))
+
+    def test_other_query_starts_over(self):
+        query = self.client.query_data_points(page_size=50)
+
+        fetch_page = query.fetch_page
+
+        def interrupted(page_number, page_size=None):
+            if page_number == 2:
+                raise KeyboardInterrupt()
+
+            return fetch_page(page_number, page_size)
+
+        query.fetch_page = interrupted
+
+        with self.assertRaises(KeyboardInterrupt):
+            query.export(self.path('points.jsonl'), batch_pages=1)
+
+        # A different (single page) query written to the same path.
+        other = self.client.query_data_points(page_size=50).filter(source='source-1')
+
+        self.assertEqual(other.export(self.path('points.jsonl')), 25)
+
+        rows = self.read_jsonl(self.path('points.jsonl'))
+
+        self.assertEqual([row['pk'] for row in rows], list(range(2, 251, 10)))
+        self.assertFalse(os.path.exists(self.path('points.jsonl.progress.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
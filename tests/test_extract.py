@@ -0,0 +1,64 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class ExtractTestSuite(StubServerTestCase):
+    """Partitioned extraction cases against a local stub server."""
+
+    stub_options = dict(size=250)
+
+    def test_partitions_cover_the_query(self):
+        base = self.client.query_data_points(page_size=20)
+
+        for query in (base, base.order_by('-source'), base.order_by('-created'), base.filter(source__in=['source-1', 'source-4'])):
+            expected = sorted(point['pk'] for point in query.clone())
+
+            for by in ('created', 'source'):
+                for partitions in (2, 3, 7):
+                    parts = query.partition(partitions, by=by)
+
+                    self.assertEqual(sum(part.count() for part in parts), len(expected), (query.order_bys, by, partitions))
+
+                    extracted = [point['pk'] for point in self.client.extract(query, partitions=partitions, by=by, workers=3)]
+
+                    self.assertEqual(sorted(extracted), expected, (query.order_bys, by, partitions))
+
+    def test_extraction_can_be_iterated_again(self):
+        extraction = self.client.extract(self.client.query_data_points(page_size=20), partitions=3)
+
+        for attempt in range(2):
+            self.assertEqual(sorted(point['pk'] for point in extraction), list(range(1, 251)))
+
+    def test_shards_keep_fields(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            query = self.client.query_data_points(page_size=50).only('pk')
+
+            for processes in (False, True):
+                shards = self.client.extract_shards(query, os.path.join(directory, str(processes)), partitions=3, processes=processes)
+
+                rows = []
+
+                for path, written in shards:
+                    with io.open(path, encoding='utf-8') as shard_file:
+                        rows.extend(json.loads(line) for line in shard_file)
+
+                self.assertEqual(sum(written for path, written in shards), 250)
+                self.assertEqual(sorted(row['pk'] for row in rows), list(range(1, 251)))
+                self.assertTrue(all(list(row.keys()) == ['pk'] for row in rows))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
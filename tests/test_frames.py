@@ -0,0 +1,59 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import unittest
+
+try:
+    import numpy
+    import pandas
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'numpy and pandas are not installed')
+class FramesTestSuite(StubServerTestCase):
+    """to_numpy() and to_dataframe() cases against a local stub server."""
+
+    stub_options = dict(size=50)
+
+    def setUp(self):
+        super().setUp()
+
+        points = self.server.state.points
+
+        # The first point lacks a field, and another field first appears on the second page.
+        del points[0]['generator_identifier']
+
+        for point in points[20:]:
+            point['properties']['extra'] = point['pk']
+
+    def test_infers_columns_from_every_page(self):
+        stats = {}
+
+        columns = self.client.query_data_points(page_size=20).to_numpy(stats=stats)
+
+        self.assertEqual(stats['points'], 50)
+        self.assertIn('process_peak_rss_bytes', stats)
+
+        self.assertEqual(len(columns['generator_identifier']), 50)
+        self.assertIsNone(columns['generator_identifier'][0])
+        self.assertEqual(columns['generator_identifier'][1], 'pdk-device-battery')
+
+        # Integers with missing values become float64 with NaN, as within a page.
+        self.assertTrue(numpy.isnan(columns['properties.extra'][:20]).all())
+        self.assertEqual(list(columns['properties.extra'][20:]), list(range(21, 51)))
+
+        self.assertEqual(columns['created'].dtype, numpy.dtype('datetime64[us]'))
+
+    def test_dataframe(self):
+        frame = self.client.query_data_points(page_size=20).to_dataframe(fields=['source', 'created', 'properties.level'])
+
+        self.assertEqual(list(frame.columns), ['source', 'created', 'properties.level'])
+        self.assertEqual(len(frame), 50)
+        self.assertEqual(str(frame['created'].dt.tz), 'UTC')
+
+
+if __name__ == '__main__':
+    unittest.main()
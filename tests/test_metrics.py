@@ -0,0 +1,140 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import unittest
+
+import requests
+
+from pdk_client import PDKInstrumentation, PDKStatsCollector
+from pdk_client.metrics import PDKHistogram
+
+
+class HistogramTestSuite(unittest.TestCase):
+    """PDKHistogram buckets and nearest-rank percentiles."""
+
+    def test_percentiles(self):
+        histogram = PDKHistogram((1, 10, 100))
+
+        self.assertIsNone(histogram.percentile(50))
+
+        for value in range(1, 101):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.percentile(50), 50)
+        self.assertEqual(histogram.percentile(90), 90)
+        self.assertEqual(histogram.percentile(99), 99)
+        self.assertEqual(histogram.percentile(100), 100)
+        self.assertEqual(histogram.percentile(0), 1)
+
+        self.assertEqual(histogram.bucket_counts, [1, 9, 90, 0])
+
+        summary = histogram.summary()
+
+        self.assertEqual((summary['count'], summary['sum'], summary['mean'], summary['max']), (100, 5050, 50.5, 100))
+
+    def test_sample_window(self):
+        histogram = PDKHistogram((1,), samples=10)
+
+        for value in range(100):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(0), 90)
+
+
+class StatsCollectorTestSuite(StubServerTestCase):
+    """Instrumentation events and PDKStatsCollector against a local stub server."""
+
+    stub_options = dict(size=250)
+
+    def setUp(self):
+        super().setUp()
+
+        self.stats = PDKStatsCollector()
+        self.events = []
+
+        self.instrumented = self.stub_client(instrumentation=PDKInstrumentation(self.stats, self.events.append), page_cache_pages=10)
+
+    def events_of(self, kind):
+        return [event for event in self.events if event['event'] == kind]
+
+    def test_counts_requests_and_pages(self):
+        query = self.instrumented.query_data_points(page_size=50)
+
+        self.assertEqual(len(list(query)), 250)
+
+        query.clone()[0]
+
+        summary = self.stats.summary()
+
+        self.assertEqual(summary['requests'], len(self.server.state.requests))
+        self.assertEqual(summary['pages'], 6)
+        self.assertEqual(summary['memory_cache_hits'], 1)
+        self.assertEqual(summary['cache_misses'], 5)
+        self.assertEqual(summary['request_seconds']['count'], summary['requests'])
+        self.assertTrue(summary['bytes'] > 0)
+
+    def test_stream_and_adaptive_pages(self):
+        query = self.instrumented.query_data_points(page_size=50)
+
+        list(query.stream())
+
+        self.assertEqual([event['page_index'] for event in self.events_of('page')], [0, 1, 2, 3, 4])
+
+        del self.events[:]
+
+        list(query.iterate_adaptive(min_page_size=50, max_page_size=50))
+
+        self.assertEqual([event['page_index'] for event in self.events_of('page')], [0, 1, 2, 3, 4])
+        self.assertTrue(all(event['decode_seconds'] is not None for event in self.events_of('page')))
+
+    def test_failures_without_retries(self):
+        self.server.state.faults.append(504)
+
+        list(self.instrumented.query_data_points(page_size=100).iterate_adaptive(min_page_size=50))
+
+        self.server.state.faults.append(400)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.instrumented.query_data_points().count()
+
+        summary = self.stats.summary()
+
+        self.assertEqual(summary['failures'], 2)
+        self.assertEqual(summary['requests'] + summary['failures'], len(self.server.state.requests))
+
+    def test_openmetrics(self):
+        self.instrumented.query_data_points(page_size=50).count()
+
+        text = self.stats.openmetrics()
+        lines = text.splitlines()
+
+        self.assertTrue(text.endswith('# EOF\n'))
+        self.assertIn('# TYPE pdk_client_requests counter', lines)
+        self.assertIn('pdk_client_requests_total 1', lines)
+        self.assertIn('# TYPE pdk_client_request_seconds histogram', lines)
+        self.assertIn('pdk_client_request_seconds_bucket{le="+Inf"} 1', lines)
+        self.assertIn('pdk_client_request_seconds_count 1', lines)
+
+        buckets = [int(line.split()[-1]) for line in lines if line.startswith('pdk_client_response_bytes_bucket')]
+
+        self.assertEqual(buckets, sorted(buckets))
+
+        self.stats.reset()
+
+        self.assertIn('pdk_client_requests_total 0', self.stats.openmetrics().splitlines())
+
+    def test_failing_listener_is_isolated(self):
+        def broken(event):
+            raise RuntimeError('Listener failed')
+
+        self.instrumented.transport.instrumentation.add_listener(broken)
+
+        self.assertEqual(self.instrumented.query_data_points().count(), 250)
+        self.assertEqual(self.stats.summary()['requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
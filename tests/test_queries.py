@@ -0,0 +1,309 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+
+class QueryTestSuite(StubServerTestCase):
+    """Data point query cases against a local stub server."""
+
+    stub_options = dict(size=250)
+
+    def page_requests(self):
+        return [params for path, params in self.server.state.requests if path.endswith('/api/data-points.json')]
+
+    def test_iterate_prefetch(self):
+        query = self.stub_client().query_data_points(page_size=50)
+
+        for prefetch in (0, 1, 4, 10):
+            points = list(query.iterate(prefetch=prefetch, workers=2))
+
+            self.assertEqual([point['pk'] for point in points], list(range(1, 251)))
+
+        with self.assertRaises(ValueError):
+            list(query.iterate(prefetch=-1))
+
+    def test_count_requests_one_item(self):
+        query = self.stub_client().query_data_points(page_size=50).filter(source='source-1')
+
+        self.assertEqual(query.count(), 25)
+        self.assertEqual(query.count(), 25)
+
+        self.assertEqual([params['page_size'] for params in self.page_requests()], ['1'])
+
+        sources = self.stub_client().query_data_sources()
+
+        self.assertEqual(sources.count(), 10)
+        self.assertEqual(sources.count(), 10)
+
+        source_requests = [params for path, params in self.server.state.requests if path.endswith('/api/data-sources.json')]
+
+        self.assertEqual([params['page_size'] for params in source_requests], ['1'])
+
+    def test_count_many(self):
+        client = self.stub_client()
+
+        base = client.query_data_points(page_size=50)
+
+        queries = [base.filter(source='source-%d' % index) for index in (3, 1, 7)] + [base.filter(source='missing'), base]
+
+        self.assertEqual(client.count_many(queries, workers=3), [25, 25, 25, 0, 250])
+        self.assertEqual(client.count_many([]), [])
+
+        # Each query keeps its count, so counting again sends nothing.
+        requests_sent = len(self.page_requests())
+
+        self.assertEqual([query.count() for query in queries], [25, 25, 25, 0, 250])
+        self.assertEqual(len(self.page_requests()), requests_sent)
+
+    def test_iterate_keyset_shared_keys(self):
+        # Groups of 7 points share a created value, so ties span page boundaries.
+        for point in self.server.state.points:
+            point['created'] = self.server.state.points[(point['pk'] - 1) // 7 * 7]['created']
+
+        query = self.stub_client().query_data_points(page_size=5)
+
+        pages = []
+
+        points = list(query.iterate_keyset(key='created', tie_breaker='pk', on_page=pages.append))
+
+        self.assertEqual([point['pk'] for point in points], list(range(1, 251)))
+        self.assertEqual(len(pages), 50)
+        self.assertEqual(pages[-1], (points[-1]['created'], 250))
+
+        # Resuming after any page yields exactly the remaining points.
+        resumed = list(query.iterate_keyset(key='created', tie_breaker='pk', after=pages[22]))
+
+        self.assertEqual([point['pk'] for point in resumed], list(range(116, 251)))
+
+    def test_shared_page_cache(self):
+        client = self.stub_client(page_cache_pages=2)
+
+        query = client.query_data_points(page_size=50)
+
+        self.assertEqual(query[120]['pk'], 121) # Pages 0 and 2.
+        self.assertEqual(query.clone()[125]['pk'], 126) # Both from the cache.
+
+        self.assertEqual(len(self.page_requests()), 2)
+        self.assertEqual((client.page_cache.hits, client.page_cache.misses), (2, 2))
+
+        self.assertEqual(query[180]['pk'], 181) # Page 3 evicts page 0, the least recently used.
+        self.assertEqual(query.clone()[10]['pk'], 11)
+
+        self.assertEqual(len(self.page_requests()), 4)
+        self.assertEqual((client.page_cache.hits, client.page_cache.misses), (2, 4))
+
+        # Queries repeating a snapshot share pages; other snapshots do not.
+        snapshot = query.filters[0]['recorded__lte']
+
+        self.assertEqual(client.query_data_points(page_size=50, snapshot=snapshot)[190]['pk'], 191)
+        self.assertEqual(len(self.page_requests()), 4)
+
+        client.query_data_points(page_size=50).first()
+
+        self.assertEqual(len(self.page_requests()), 5)
+
+    def test_disk_cache_hits_count_toward_memory_bound(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            first = self.stub_client(disk_cache_dir=directory)
+
+            query = first.query_data_points(page_size=10)
+            snapshot = query.filters[0]['recorded__lte']
+
+            self.assertEqual(len(list(query)), 250)
+
+            first.close()
+
+            del self.server.state.requests[:]
+
+            client = self.stub_client(disk_cache_dir=directory, page_cache_bytes=10000)
+
+            points = list(client.query_data_points(page_size=10, snapshot=snapshot))
+
+            self.assertEqual([point['pk'] for point in points], list(range(1, 251)))
+            self.assertEqual(self.page_requests(), [])
+            self.assertEqual(client.disk_cache.hits, 25)
+
+            # Pages served from disk are sized in the memory cache and evicted at its bound.
+            self.assertTrue(0 < client.page_cache.total_bytes <= 10000)
+            self.assertTrue(1 < len(client.page_cache.pages) < 25)
+
+            client.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_source_updates_invalidate_cached_sources(self):
+        client = self.stub_client(page_cache_pages=8)
+
+        points = client.query_data_points(page_size=50)
+        points[0]
+
+        self.assertEqual(client.query_data_sources()[0]['name'], 'Source 0')
+
+        client.update_data_sources().filter(identifier='source-0').update(name='Renamed')
+
+        self.assertEqual(client.query_data_sources()[0]['name'], 'Renamed')
+
+        client.bulk_update_data_sources({'source-0': {'name': 'Renamed again'}})
+
+        self.assertEqual(client.query_data_sources()[0]['name'], 'Renamed again')
+
+        # Snapshotted data point pages stay cached.
+        hits = client.page_cache.hits
+        points.clone()[1]
+
+        self.assertEqual(client.page_cache.hits, hits + 1)
+
+    def test_slices(self):
+        query = self.stub_client().query_data_points(page_size=50)
+
+        expected = list(range(1, 251))
+
+        for bounds in [(None, None, None), (10, 20, None), (45, 55, None), (-5, None, None), (None, -240, None), (240, 400, None), (300, 400, None), (20, 10, None), (None, None, 7), (3, 230, 60), (None, None, -1), (200, 20, -45), (-1, -10, -3)]:
+            view = query[slice(*bounds)]
+
+            self.assertEqual([point['pk'] for point in view], expected[slice(*bounds)], bounds)
+            self.assertEqual(len(view), len(expected[slice(*bounds)]), bounds)
+
+        view = query[10:200:3]
+
+        self.assertEqual([point['pk'] for point in view[5:20:2]], expected[10:200:3][5:20:2])
+        self.assertEqual(view[-1]['pk'], expected[10:200:3][-1])
+
+        with self.assertRaises(IndexError):
+            view[len(view)]
+
+    def test_slice_fetches_covering_pages(self):
+        query = self.stub_client().query_data_points(page_size=50)
+        query.count()
+
+        del self.server.state.requests[:]
+
+        self.assertEqual([point['pk'] for point in query[60:70]], list(range(61, 71)))
+        self.assertEqual([params['page_index'] for params in self.page_requests()], ['1'])
+
+        del self.server.state.requests[:]
+
+        self.assertEqual([point['pk'] for point in query[45:160:50]], [46, 96, 146])
+        self.assertEqual(sorted(params['page_index'] for params in self.page_requests()), ['0', '1', '2'])
+
+
+    def test_latest(self):
+        query = self.stub_client().query_data_points(page_size=50)
+
+        self.assertEqual(query.last()['pk'], 250)
+        self.assertEqual([point['pk'] for point in query.latest(3)], [250, 249, 248])
+
+        del self.server.state.requests[:]
+
+        ordered = query.order_by('-pk')
+
+        self.assertEqual([point['pk'] for point in ordered.latest(3)], [1, 2, 3])
+        self.assertEqual(len(self.page_requests()), 1)
+
+        self.assertIsNone(query.filter(source='missing').last())
+
+    def test_batch_futures(self):
+        client = self.stub_client()
+
+        query = client.query_data_points(page_size=50)
+
+        with client.batch() as batch:
+            counts = dict((source, batch.count(query.filter(source=source))) for source in ('source-1', 'source-2'))
+
+            ordered = query.order_by('created')
+
+            first = batch.first(ordered)
+            last = batch.last(ordered)
+            page = batch.page(ordered, 2)
+
+            self.assertFalse(first.done()) # Nothing runs before the block exits.
+            self.assertEqual(self.page_requests(), [])
+
+        self.assertEqual(dict((source, future.result()) for source, future in counts.items()), {'source-1': 25, 'source-2': 25})
+        self.assertEqual(first.result()['pk'], 1)
+        self.assertEqual(last.result()['pk'], 250)
+        self.assertEqual([point['pk'] for point in page.result()], list(range(101, 151)))
+
+    def test_batch_errors(self):
+        client = self.stub_client()
+
+        query = client.query_data_points(page_size=50)
+
+        self.server.state.faults.append(400)
+
+        with client.batch(workers=1) as batch:
+            failed = batch.count(query.filter(source='source-1'))
+            succeeded = batch.count(query.filter(source='source-2'))
+
+        # A failed request resolves its own future only.
+        with self.assertRaises(requests.exceptions.HTTPError):
+            failed.result()
+
+        self.assertEqual(succeeded.result(), 25)
+
+        del self.server.state.requests[:]
+
+        # Leaving the block with an exception cancels everything queued.
+        with self.assertRaises(RuntimeError):
+            with client.batch() as batch:
+                cancelled = batch.count(query)
+
+                raise RuntimeError('Stop')
+
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(self.page_requests(), [])
+
+    def test_projection(self):
+        # The stub ignores the requested fields, like servers without projection support.
+        query = self.stub_client().query_data_points(page_size=50).only('pk', 'properties.level')
+
+        expected = [{'pk': pk, 'properties': {'level': (pk - 1) % 100}} for pk in range(1, 251)]
+
+        self.assertEqual(list(query), expected)
+        self.assertEqual(list(query.stream()), expected)
+        self.assertEqual(list(query.iterate_adaptive(min_page_size=25)), expected)
+
+        self.assertEqual(list(query.values_list('pk', flat=True)), list(range(1, 251)))
+        self.assertEqual(list(query.values_list('pk', 'properties.level'))[120], (121, 20))
+
+        with self.assertRaises(TypeError):
+            query.values_list('pk', 'source', flat=True)
+
+    def test_adaptive_server_page_size_cap(self):
+        self.server.state.max_page_size = 50
+
+        # Pages grow from 25 until the server answers a request for 100 with 50.
+        query = self.stub_client().query_data_points(page_size=25)
+
+        points = list(query.iterate_adaptive(min_page_size=25, target_seconds=60))
+
+        self.assertEqual([point['pk'] for point in points], list(range(1, 251)))
+        self.assertEqual([int(params['page_size']) for params in self.page_requests()], [25, 25, 50, 100, 50, 50, 50])
+
+    def test_adaptive_halves_on_timeout(self):
+        self.server.state.faults.extend([504, 504])
+
+        query = self.stub_client().query_data_points(page_size=100)
+
+        points = list(query.iterate_adaptive(min_page_size=25, target_seconds=60))
+
+        self.assertEqual([point['pk'] for point in points], list(range(1, 251)))
+
+        page_sizes = [int(params['page_size']) for params in self.page_requests()]
+
+        # 100 and 50 time out without retries; 25 succeeds and grows back on aligned offsets.
+        self.assertEqual(page_sizes[:3], [100, 50, 25])
+        self.assertEqual(page_sizes[3:], [25, 50, 100, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import unittest
+
+import requests
+
+from pdk_client import PDKRetryPolicy, PDKClientCircuitOpen
+
+
+class RetryTestSuite(StubServerTestCase):
+    """Retry policy cases against a fault-injecting stub server."""
+
+    stub_options = dict(size=10)
+
+    def retry_client(self, **kwargs):
+        kwargs.setdefault('base_delay', 0.01)
+        kwargs.setdefault('max_delay', 0.05)
+
+        return self.stub_client(retry_policy=PDKRetryPolicy(**kwargs))
+
+    def test_retries_server_errors(self):
+        self.server.state.faults.extend([503, 'drop', 504])
+
+        self.assertEqual(self.retry_client().query_data_points().count(), 10)
+        self.assertEqual(len(self.server.state.requests), 4)
+
+    def test_fails_fast_on_non_retryable_status(self):
+        self.server.state.faults.append(401)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.retry_client().query_data_points().count()
+
+        self.assertEqual(len(self.server.state.requests), 1)
+
+    def test_honors_retry_after(self):
+        self.server.state.faults.append((429, {'Retry-After': '0'}))
+
+        policy = PDKRetryPolicy(base_delay=60)
+
+        client = self.stub_client(retry_policy=policy)
+
+        self.assertEqual(client.query_data_points().count(), 10)
+
+    def test_gives_up_after_retry_duration(self):
+        self.server.state.faults.extend([503] * 10)
+
+        with self.assertRaises(pdk_client.client.PDKClientServerError):
+            self.retry_client(max_retry_duration=0.1).query_data_points().count()
+
+    def test_shared_retry_budget(self):
+        client = self.retry_client(budget_ratio=0.0, budget_capacity=1)
+
+        self.server.state.faults.extend([503, 503])
+
+        with self.assertRaises(pdk_client.client.PDKClientServerError):
+            client.query_data_points().count()
+
+        self.assertEqual(len(self.server.state.requests), 2)
+
+    def test_circuit_breaker(self):
+        client = self.retry_client(failure_threshold=2, reset_timeout=60)
+
+        self.server.state.faults.extend([503] * 5)
+
+        with self.assertRaises(pdk_client.client.PDKClientServerError):
+            client.query_data_points().count()
+
+        requests_sent = len(self.server.state.requests)
+
+        with self.assertRaises(PDKClientCircuitOpen):
+            client.query_data_sources().count()
+
+        self.assertEqual(len(self.server.state.requests), requests_sent)
+
+    def test_decorrelated_jitter_bounds(self):
+        policy = PDKRetryPolicy(base_delay=1, max_delay=10, max_retry_duration=1000)
+
+        delay = None
+
+        for attempt in range(20):
+            next_delay = policy.next_delay(delay, 0)
+
+            self.assertTrue(1 <= next_delay <= 10)
+
+            if delay is not None:
+                self.assertTrue(next_delay <= delay * 3)
+
+            delay = next_delay
+
+    def test_first_delays_vary(self):
+        policy = PDKRetryPolicy(base_delay=1, max_delay=10, max_retry_duration=1000)
+
+        first_delays = [policy.next_delay(None, 0) for attempt in range(50)]
+
+        self.assertTrue(all(1 <= delay <= 3 for delay in first_delays))
+        self.assertTrue(len(set(first_delays)) > 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
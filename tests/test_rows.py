@@ -0,0 +1,97 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import datetime
+import json
+import unittest
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from pdk_client.rows import PDKDataPoint
+
+
+class RowsTestSuite(StubServerTestCase):
+    """PDKDataPoint rows, directly and from query.as_rows()."""
+
+    stub_options = dict(size=20)
+
+    def test_mapping(self):
+        point = dict(self.server.state.points[0])
+        point['extra_field'] = 'extra'
+
+        row = PDKDataPoint(point)
+
+        self.assertIsInstance(row, Mapping)
+        self.assertEqual(row['pk'], 1)
+        self.assertEqual(row['properties']['level'], 0)
+        self.assertEqual(row['extra_field'], 'extra')
+        self.assertEqual(row.get('missing', 'default'), 'default')
+        self.assertIn('extra_field', row)
+        self.assertNotIn('missing', row)
+
+        with self.assertRaises(KeyError):
+            row['missing']
+
+        self.assertEqual(len(row), len(point))
+        self.assertEqual(set(row.keys()), set(point.keys()))
+        self.assertEqual(row.to_dict(), point)
+        self.assertEqual(dict(row), point)
+        self.assertEqual(row, point)
+
+        with self.assertRaises(TypeError):
+            row['pk'] = 2
+
+    def test_without_extra_keys(self):
+        point = self.server.state.points[0]
+
+        row = PDKDataPoint(point)
+
+        self.assertIsNone(row.extra)
+        self.assertEqual(list(row.keys()), ['pk', 'source', 'generator_identifier', 'created', 'recorded', 'properties'])
+
+    def test_lazy_timestamps(self):
+        row = PDKDataPoint(self.server.state.points[0])
+
+        self.assertIsNone(row.created_datetime)
+
+        created_at = row.created_at
+
+        self.assertEqual(created_at, datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        self.assertIs(row.created_at, created_at)
+        self.assertEqual(row.recorded_at - created_at, datetime.timedelta(seconds=30))
+
+        self.assertIsNone(PDKDataPoint({'pk': 1}).created_at)
+
+    def test_properties_as_json_text(self):
+        properties = {'level': 50, 'passive-data-metadata': {'source': 'source-1'}}
+
+        row = PDKDataPoint({'pk': 1, 'properties': json.dumps(properties)})
+
+        self.assertFalse(row.properties_decoded)
+        self.assertEqual(row['properties'], properties)
+        self.assertTrue(row.properties_decoded)
+        self.assertIs(row.properties, row['properties'])
+        self.assertEqual(row.to_dict()['properties'], properties)
+
+    def test_query_rows(self):
+        query = self.client.query_data_points(page_size=5)
+
+        rows = list(query.as_rows())
+
+        self.assertTrue(all(isinstance(row, PDKDataPoint) for row in rows))
+        self.assertEqual([row.to_dict() for row in rows], list(query.clone()))
+
+        # Identifiers are interned, so rows share one copy of each.
+        self.assertIs(rows[0].generator_identifier, rows[1].generator_identifier)
+        self.assertIs(rows[0].source, rows[10].source)
+
+        self.assertEqual(list(query.as_rows().as_rows(None))[0].__class__, dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
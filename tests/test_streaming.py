@@ -0,0 +1,76 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client
+
+import json
+import unittest
+
+from pdk_client.streaming import stream_matches
+
+
+class ChunkedResponse(object):
+    def __init__(self, content, encoding='utf-8'):
+        self.content = content
+        self.encoding = encoding
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+DOCUMENTS = [
+    '{"matches": [1.5e10, 7]}',
+    '{"count": 3, "page_index": 0, "page_size": 3, "matches": [-0.25, 1E-3, 12345678901234567890]}',
+    '{"matches": [true, false, null, 0], "count": 4}',
+    '{"matches": [], "count": 0}',
+    '{"count":2,"matches":[{"a":[1,[2,{"b":[]}]]},{"c":{}}],"page_size":2}',
+    '{"matches": [{"text": "café 漢字 \U0001f600"}, "über"], "count": 2}',
+    '{"matches": [{"brackets": "]}[{,:", "quote": "say \\"hi\\" \\\\", "escape": "\\u00e9\\n\\\\"}], "count": 1}',
+    '{"matches": ["\\\\", "\\"", "a\\\\\\"b"], "count": 3}',
+    json.dumps({'count': 2, 'matches': [{'pk': 1, 'properties': {'level': 0.5, 'tags': ['x', 'y']}}, {'pk': 2, 'properties': {}}], 'page_index': 0}, indent=4),
+    '{ "matches" : [ 1 , { } , [ ] , "" ] , "count" : 4 }',
+]
+
+
+class StreamingTestSuite(unittest.TestCase):
+    """Incremental page parsing at every chunk boundary."""
+
+    def parse(self, content, chunk_size):
+        metadata = {}
+
+        matches = list(stream_matches(ChunkedResponse(content), metadata, chunk_size=chunk_size))
+
+        return matches, metadata
+
+    def test_every_chunk_size(self):
+        for document in DOCUMENTS:
+            content = document.encode('utf-8')
+
+            expected = json.loads(document)
+            expected_matches = expected.pop('matches')
+
+            for chunk_size in range(1, len(content) + 2):
+                matches, metadata = self.parse(content, chunk_size)
+
+                self.assertEqual(matches, expected_matches, (document, chunk_size))
+                self.assertEqual(metadata, expected, (document, chunk_size))
+
+    def test_large_items(self):
+        point = {'pk': 1, 'properties': {'padding': 'x' * 500000, 'values': list(range(20000))}}
+
+        content = json.dumps({'count': 2, 'matches': [point, point]}).encode('utf-8')
+
+        matches, metadata = self.parse(content, 1024)
+
+        self.assertEqual(matches, [point, point])
+        self.assertEqual(metadata, {'count': 2})
+
+    def test_truncated_response(self):
+        for document in ('{"matches": [1, 2', '{"matches": [{"a": 1}', '{"count": 1'):
+            with self.assertRaises(ValueError):
+                self.parse(document.encode('utf-8'), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase
+
+import copy
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+
+class SyncTestSuite(StubServerTestCase):
+    """client.sync() resume cases against a local stub server."""
+
+    stub_options = dict(size=100)
+
+    def setUp(self):
+        super().setUp()
+
+        # Groups of 3 points share a recorded value, so ties cross page boundaries.
+        points = self.server.state.points
+
+        for point in points:
+            point['recorded'] = points[(point['pk'] - 1) // 3 * 3]['recorded']
+
+        self.directory = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.directory, 'sync.json')
+
+    def tearDown(self):
+        super().tearDown()
+
+        shutil.rmtree(self.directory)
+
+    def sync(self):
+        return self.client.sync(self.client.query_data_points(page_size=10), self.state_path)
+
+    def saved_watermark(self):
+        with open(self.state_path) as state_file:
+            return json.load(state_file)['watermark']
+
+    def test_incremental_runs(self):
+        self.assertEqual([point['pk'] for point in self.sync()], list(range(1, 101)))
+        self.assertEqual(list(self.sync()), [])
+
+        latest = self.server.state.points[-1]
+
+        for pk in (101, 102):
+            point = copy.deepcopy(latest)
+            point['pk'] = pk
+            point['recorded'] = (datetime.datetime.fromisoformat(latest['recorded']) + datetime.timedelta(seconds=pk)).isoformat()
+
+            self.server.state.points.append(point)
+
+        self.assertEqual([point['pk'] for point in self.sync()], [101, 102])
+
+    def test_resumes_after_consumer_error_mid_page(self):
+        processed = []
+
+        with self.assertRaises(RuntimeError):
+            for point in self.sync():
+                if len(processed) == 23:
+                    raise RuntimeError('Processing failed')
+
+                processed.append(point['pk'])
+
+        self.assertEqual(self.saved_watermark()[1], 23)
+
+        processed.extend(point['pk'] for point in self.sync())
+
+        self.assertEqual(processed, list(range(1, 101)))
+
+    def test_resumes_after_server_error_mid_run(self):
+        processed = []
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            for point in self.sync():
+                processed.append(point['pk'])
+
+                if len(processed) == 40:
+                    self.server.state.faults.append(400) # The request for the next page fails.
+
+        self.assertEqual(processed, list(range(1, 41)))
+        self.assertEqual(self.saved_watermark()[1], 40)
+
+        processed.extend(point['pk'] for point in self.sync())
+
+        self.assertEqual(processed, list(range(1, 101)))
+
+    def test_hard_kill_repeats_only_the_unfinished_page(self):
+        points = self.sync()
+
+        processed = [next(points)['pk'] for index in range(25)]
+
+        # Without the generator closing (the process was killed), the last full page is the watermark.
+        self.assertEqual(self.saved_watermark()[1], 20)
+
+        resumed = [point['pk'] for point in self.sync()]
+
+        self.assertEqual(resumed, list(range(21, 101)))
+        self.assertEqual(sorted(set(processed + resumed)), list(range(1, 101)))
+
+        points.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
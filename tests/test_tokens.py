@@ -0,0 +1,79 @@
+# pylint: skip-file
+# -*- coding: utf-8 -*-
+
+from .context import pdk_client, StubServerTestCase, STUB_USERNAME, STUB_PASSWORD
+
+import threading
+import time
+import unittest
+
+
+class TokenTestSuite(StubServerTestCase):
+    """Token renewal cases against a stub server issuing short-lived tokens."""
+
+    stub_options = dict(size=50, token_lifetime=60)
+
+    def token_requests(self):
+        return len([path for path, params in self.server.state.requests if path.endswith('/api/request-token.json')])
+
+    def credentials_client(self, **kwargs):
+        return self.stub_client(username=STUB_USERNAME, password=STUB_PASSWORD, **kwargs)
+
+    def test_renews_rejected_token_and_resumes(self):
+        client = self.credentials_client(token_refresh_ahead=None)
+
+        query = client.query_data_points(page_size=10)
+
+        points = []
+
+        for point in query:
+            points.append(point)
+
+            if len(points) == 25:
+                self.server.state.tokens.clear() # Expire the token mid-iteration.
+
+        self.assertEqual(len(points), 50)
+        self.assertEqual(self.token_requests(), 2)
+
+        page_requests = [params['page_index'] for path, params in self.server.state.requests if path.endswith('/api/data-points.json')]
+
+        # Only the rejected page is requested again.
+        self.assertEqual(page_requests, ['0', '1', '2', '3', '3', '4'])
+
+    def test_single_flight_renewal(self):
+        client = self.credentials_client(token_refresh_ahead=None)
+
+        query = client.query_data_points(page_size=5)
+        query.count()
+
+        self.server.state.tokens.clear()
+
+        threads = [threading.Thread(target=query.fetch_page, args=(index % 10,)) for index in range(16)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.token_requests(), 2)
+
+    def test_renews_ahead_of_expiry(self):
+        self.server.state.token_lifetime = 1
+
+        client = self.credentials_client(token_refresh_ahead=0.5)
+
+        first_token = client.token
+
+        time.sleep(0.6)
+
+        self.assertEqual(client.query_data_points().count(), 50)
+        self.assertNotEqual(client.token, first_token)
+
+        page_requests = [path for path, params in self.server.state.requests if path.endswith('/api/data-points.json')]
+
+        self.assertEqual(len(page_requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()